@@ -2,32 +2,164 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
 
-from ista_vdm_api import IstaVdmAPI, IstaVdmAuthError
-from .const import DOMAIN
+from . import websocket_api
+from .client import IstaVdmClient, async_acquire_client, async_import_library
+from .const import (
+    CONF_FAST_START,
+    CONF_FLAT_ID,
+    CONF_MAX_PARALLEL_FLATS,
+    DEFAULT_FAST_START,
+    DEFAULT_MAX_PARALLEL_FLATS,
+    DOMAIN,
+)
+from .coordinator import IstaVdmDataUpdateCoordinator, IstaVdmFlatInfoCoordinator
+from .handoff import async_pop_handoff
+from .resilience import async_get_circuit_breaker, async_retry, is_transient
+from .scheduler import async_get_scheduler
+from .services import async_setup_services
+from .store import IstaVdmDataCache, IstaVdmTokenStore
+
+if TYPE_CHECKING:
+    from ista_vdm_api import IstaVdmAPI
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+@dataclass
+class IstaVdmRuntimeData:
+    """Runtime data of an ista VDM config entry."""
+
+    api: IstaVdmAPI
+    token_store: IstaVdmTokenStore
+    coordinator: IstaVdmDataUpdateCoordinator
+    flat_coordinator: IstaVdmFlatInfoCoordinator
+    # Options the entry was set up with
+    options: dict[str, Any]
+
+
+type IstaVdmConfigEntry = ConfigEntry[IstaVdmRuntimeData]
 
-type IstaVdmConfigEntry = ConfigEntry[IstaVdmAPI]
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the ista VDM integration."""
+    websocket_api.async_setup(hass)
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: IstaVdmConfigEntry) -> bool:
     """Set up ista VDM from a config entry."""
-    api = IstaVdmAPI(entry.data["email"], entry.data["password"])
-    
-    # Test the connection during setup
+    await async_import_library(hass)
+    token_store = IstaVdmTokenStore(hass, entry.entry_id)
+
+    # Client validated by the config flow moments ago, no login needed
+    handoff = async_pop_handoff(hass, entry.unique_id, entry.data["password"])
+    # One client, session and login per account across all entries
+    client = async_acquire_client(hass, entry, handoff)
+    api = client.api
+
+    # The coordinators share the client, so refreshes reuse its session
+    # and tokens instead of logging in again. Both fetch the flats of the
+    # account concurrently, bounded together by one semaphore.
+    cache = IstaVdmDataCache(hass, entry.entry_id)
+    semaphore = asyncio.Semaphore(
+        entry.options.get(CONF_MAX_PARALLEL_FLATS, DEFAULT_MAX_PARALLEL_FLATS)
+    )
+    coordinator = IstaVdmDataUpdateCoordinator(
+        hass, api, token_store, cache, semaphore
+    )
+    flat_coordinator = IstaVdmFlatInfoCoordinator(
+        hass, api, token_store, cache, semaphore
+    )
+
+    if handoff is not None:
+        token_store.async_save(api)
+        if handoff.flat_info is not None:
+            flat_coordinator.async_set_prefetched(handoff.flat_info)
+        if handoff.records is not None:
+            coordinator.async_set_prefetched(handoff.records)
+        await _async_first_refresh(coordinator, flat_coordinator)
+    elif await cache.async_load():
+        # Come up with the data from before the restart and revalidate it in
+        # the background, so startup does not wait for the portal
+        coordinator.async_restore(cache.data)
+        flat_info_fresh = flat_coordinator.async_restore(cache.data)
+        _async_schedule_revalidate(
+            hass,
+            entry,
+            client,
+            coordinator,
+            None if flat_info_fresh else flat_coordinator,
+        )
+    elif entry.options.get(CONF_FAST_START, DEFAULT_FAST_START) and (
+        flat_ids := _async_known_flats(hass, entry)
+    ):
+        # No data to come up with, register the entities of the flats from
+        # before the restart with their last state and fetch after startup
+        coordinator.async_restore_flats(flat_ids)
+        _async_schedule_revalidate(hass, entry, client, coordinator, flat_coordinator)
+    else:
+        if not await _async_authenticate(hass, entry, client, token_store):
+            return False
+        await _async_first_refresh(coordinator, flat_coordinator)
+
+    entry.runtime_data = IstaVdmRuntimeData(
+        api=api,
+        token_store=token_store,
+        coordinator=coordinator,
+        flat_coordinator=flat_coordinator,
+        options=dict(entry.options),
+    )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    return True
+
+
+async def _async_authenticate(
+    hass: HomeAssistant,
+    entry: IstaVdmConfigEntry,
+    client: IstaVdmClient,
+    token_store: IstaVdmTokenStore,
+) -> bool:
+    """Authenticate the client.
+
+    Returns False after starting a reauth flow if the portal rejected the
+    credentials. Failures to reach the portal are retried like refreshes
+    and then raised as ConfigEntryNotReady, without asking for the password.
+    """
+    from ista_vdm_api import IstaVdmAuthError
+
+    scheduler = async_get_scheduler(hass)
+
+    async def _async_login() -> None:
+        # Logins count against the same cap as refreshes
+        async with scheduler.async_slot():
+            await client.async_login(token_store)
+
     try:
-        await api.authenticate()
+        await async_retry(async_get_circuit_breaker(hass), _async_login)
     except IstaVdmAuthError as err:
-        # If auth fails, trigger re-authentication flow
+        if is_transient(err):
+            raise ConfigEntryNotReady(f"Error communicating with API: {err}") from err
         _LOGGER.error(
             "Authentication failed for %s: %s. Triggering re-authentication.",
             entry.title,
@@ -36,28 +168,119 @@ async def async_setup_entry(hass: HomeAssistant, entry: IstaVdmConfigEntry) -> b
         entry.async_start_reauth(hass)
         return False
     except Exception as err:
-        # For other errors, log and still try to set up
-        _LOGGER.error(
-            "Unexpected error during authentication for %s: %s",
-            entry.title,
-            err
-        )
-        entry.async_start_reauth(hass)
-        return False
-    
-    entry.runtime_data = api
-    
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    
+        # Anything else says nothing about the credentials
+        raise ConfigEntryNotReady(f"Error communicating with API: {err}") from err
+
+    token_store.async_save(client.api)
     return True
 
 
+async def _async_first_refresh(
+    coordinator: IstaVdmDataUpdateCoordinator,
+    flat_coordinator: IstaVdmFlatInfoCoordinator,
+) -> None:
+    """Fetch the flat information and the consumption data concurrently.
+
+    The two do not depend on each other, so a cold start waits for the
+    slower of them instead of both in a row. Both are awaited before a
+    failure of either is raised, so none keeps running for a failed setup.
+    """
+    results = await asyncio.gather(
+        flat_coordinator.async_config_entry_first_refresh(),
+        coordinator.async_config_entry_first_refresh(),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+@callback
+def _async_known_flats(hass: HomeAssistant, entry: IstaVdmConfigEntry) -> list[str]:
+    """Return the flats that had a device before the restart."""
+    prefix = f"{entry.entry_id}_"
+    flat_ids: list[str] = []
+    for device in dr.async_entries_for_config_entry(
+        dr.async_get(hass), entry.entry_id
+    ):
+        for domain, identifier in device.identifiers:
+            if domain != DOMAIN:
+                continue
+            if identifier == entry.entry_id:
+                # The primary flat's device predates multi-flat support
+                if (flat_id := entry.data.get(CONF_FLAT_ID)) is not None:
+                    flat_ids.insert(0, flat_id)
+            elif identifier.startswith(prefix):
+                flat_ids.append(identifier.removeprefix(prefix))
+    return flat_ids
+
+
+@callback
+def _async_schedule_revalidate(
+    hass: HomeAssistant,
+    entry: IstaVdmConfigEntry,
+    client: IstaVdmClient,
+    coordinator: IstaVdmDataUpdateCoordinator,
+    flat_coordinator: IstaVdmFlatInfoCoordinator | None,
+) -> None:
+    """Revalidate restored data in the background.
+
+    In fast-start mode this waits until Home Assistant has started, so the
+    login and the downloads do not compete with the setup of other
+    integrations.
+    """
+
+    @callback
+    def _async_start(_: HomeAssistant) -> None:
+        entry.async_create_background_task(
+            hass,
+            _async_revalidate(hass, entry, client, coordinator, flat_coordinator),
+            f"{DOMAIN} revalidate {entry.title}",
+        )
+
+    if entry.options.get(CONF_FAST_START, DEFAULT_FAST_START):
+        entry.async_on_unload(async_at_started(hass, _async_start))
+    else:
+        _async_start(hass)
+
+
+async def _async_revalidate(
+    hass: HomeAssistant,
+    entry: IstaVdmConfigEntry,
+    client: IstaVdmClient,
+    coordinator: IstaVdmDataUpdateCoordinator,
+    flat_coordinator: IstaVdmFlatInfoCoordinator | None,
+) -> None:
+    """Authenticate and refresh data that was restored from the cache."""
+    try:
+        if not await _async_authenticate(
+            hass, entry, client, coordinator.token_store
+        ):
+            return
+    except ConfigEntryNotReady as err:
+        # The portal, not the credentials: the refreshes log in on their
+        # own and back off while it stays unreachable
+        _LOGGER.debug("Login for %s failed: %s", entry.title, err)
+    if flat_coordinator is not None:
+        await asyncio.gather(
+            flat_coordinator.async_refresh(), coordinator.async_refresh()
+        )
+    else:
+        await coordinator.async_refresh()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: IstaVdmConfigEntry) -> bool:
     """Unload a config entry."""
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: IstaVdmConfigEntry) -> None:
+    """Remove the persisted tokens and data of a removed config entry."""
+    await IstaVdmTokenStore(hass, entry.entry_id).async_remove()
+    await IstaVdmDataCache(hass, entry.entry_id).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: IstaVdmConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
\ No newline at end of file
+    """Reload config entry if its options changed."""
+    if entry.options != entry.runtime_data.options:
+        await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,188 @@
+"""Account-level pool of ista VDM API clients."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import importlib
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, TypeVar
+
+import aiohttp
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import DOMAIN
+from .handoff import IstaVdmHandoff
+from .store import IstaVdmTokenStore
+
+if TYPE_CHECKING:
+    from ista_vdm_api import IstaVdmAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CLIENTS = f"{DOMAIN}_clients"
+
+_T = TypeVar("_T")
+
+
+@dataclass(slots=True)
+class IstaVdmClient:
+    """API client shared by all config entries of one ista account."""
+
+    api: IstaVdmAPI
+    session: aiohttp.ClientSession
+    users: int = 0
+    _login_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    async def async_login(self, token_store: IstaVdmTokenStore) -> None:
+        """Authenticate the client unless another entry already did.
+
+        Persisted tokens are reused if possible, otherwise the client logs
+        in with its password. Concurrent callers wait for a single login.
+        """
+        async with self._login_lock:
+            if self.api.is_authenticated:
+                return
+            if not await token_store.async_restore(self.api):
+                await self.api.authenticate()
+
+
+async def async_import_library(hass: HomeAssistant) -> None:
+    """Import the client library in the import executor.
+
+    The modules of the integration import the library, and BeautifulSoup
+    with it, only where it is used, so loading the integration does not
+    pay for it. Flows and setups call this first to keep the import off
+    the event loop.
+    """
+    await hass.async_add_import_executor_job(importlib.import_module, "ista_vdm_api")
+
+
+def _account(email: str) -> str:
+    """Return the pool key of an account."""
+    return email.strip().casefold()
+
+
+@callback
+def async_acquire_client(
+    hass: HomeAssistant, entry: ConfigEntry, handoff: IstaVdmHandoff | None
+) -> IstaVdmClient:
+    """Return the pooled client of the entry's account.
+
+    The client is released when the entry is unloaded, and its session
+    detached once the last entry of the account released it. A client
+    handed over by the config flow seeds the pool, or is dropped if the
+    account already has a client.
+    """
+    from ista_vdm_api import IstaVdmAPI
+
+    clients: dict[str, IstaVdmClient] = hass.data.setdefault(DATA_CLIENTS, {})
+    account = _account(entry.data[CONF_EMAIL])
+    client = clients.get(account)
+
+    if client is not None and client.api.password == entry.data[CONF_PASSWORD]:
+        _LOGGER.debug("Sharing the client of %s", entry.data[CONF_EMAIL])
+        if handoff is not None:
+            handoff.session.detach()
+    else:
+        # New account, or new credentials after a reauth: entries still
+        # holding the previous client keep it until they are unloaded
+        if handoff is not None:
+            client = IstaVdmClient(handoff.api, handoff.session)
+        else:
+            # Own cookie jar for the Keycloak login, pooled connections
+            # from HA. Detached by the pool, not by the entry's unload.
+            session = async_create_clientsession(hass, auto_cleanup=False)
+            client = IstaVdmClient(
+                IstaVdmAPI(
+                    entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD], session
+                ),
+                session,
+            )
+        clients[account] = client
+
+    client.users += 1
+
+    @callback
+    def _async_release() -> None:
+        client.users -= 1
+        if client.users:
+            return
+        if clients.get(account) is client:
+            del clients[account]
+        client.session.detach()
+
+    entry.async_on_unload(_async_release)
+    return client
+
+
+async def async_get_flat_ids(api: IstaVdmAPI) -> list[str]:
+    """Return the ids of all flats of the account, in portal order.
+
+    The library only keeps the first flat of the account, so the list is
+    read from the portal directly with the client's session and token,
+    at the portal address the library uses.
+    """
+    from ista_vdm_api import IstaVdmAuthError, IstaVdmError
+    from ista_vdm_api import api as ista_api
+
+    await api._ensure_token_valid()
+    session = await api._get_session()
+    try:
+        async with session.get(
+            f"{ista_api.BASE_URL}/api/flats",
+            headers={"Authorization": f"Bearer {api._access_token}"},
+        ) as response:
+            if response.status == 401:
+                # Let the client log in again on its next request
+                api._access_token = None
+                raise IstaVdmAuthError("Token expired or invalid")
+            if response.status != 200:
+                raise IstaVdmError(f"Failed to list flats: {response.status}")
+            result = await response.json()
+    except (aiohttp.ClientError, TimeoutError) as err:
+        raise IstaVdmError(f"Network error: {err!r}") from err
+
+    flats = result.get("data", result) if isinstance(result, dict) else result
+    if not flats:
+        # Like the library's login, so a glitch does not count as a refresh
+        # that removed every flat of the account
+        raise IstaVdmError("No flats found for this user")
+    return [str(flat["id"]) for flat in flats]
+
+
+async def async_fetch_flat(
+    api: IstaVdmAPI, flat_id: str, fetch: Callable[[IstaVdmAPI], Awaitable[_T]]
+) -> _T:
+    """Return the data of one flat of the account, fetched with ``api``.
+
+    The library addresses a single flat per client, so the other flats are
+    fetched through a copy pinned to the flat. The tokens of ``api`` must
+    have been validated right before. The copy uses them as they are and
+    never refreshes them or logs in by itself: a login would move it back
+    to the first flat of the account, and its new tokens would not reach
+    ``api``. Tokens the portal rejected are cleared on ``api`` as well, so
+    its next request logs in again.
+    """
+    from ista_vdm_api import IstaVdmAuthError
+
+    if flat_id == api.flat_id:
+        return await fetch(api)
+    if (token := api._access_token) is None:
+        raise IstaVdmAuthError("Not authenticated")
+    view = copy.copy(api)
+    view._flat_id = flat_id
+    view._token_expires = None
+    try:
+        return await fetch(view)
+    except IstaVdmAuthError:
+        if view._access_token is None and api._access_token == token:
+            api._access_token = None
+            api._refresh_token = None
+        raise
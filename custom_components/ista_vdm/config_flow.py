@@ -11,9 +11,28 @@ from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 
-from ista_vdm_api import IstaVdmAPI, IstaVdmAuthError
-from .const import DOMAIN
+from .client import async_import_library
+from .const import (
+    CONF_CHECK_DATA,
+    CONF_COMPACT_HISTORY,
+    CONF_FAST_START,
+    CONF_HISTORY_MONTHS,
+    CONF_MAX_PARALLEL_FLATS,
+    CONF_SERVE_STALE,
+    CONF_STALE_BUDGET_DAYS,
+    DEFAULT_COMPACT_HISTORY,
+    DEFAULT_FAST_START,
+    DEFAULT_HISTORY_MONTHS,
+    DEFAULT_MAX_PARALLEL_FLATS,
+    DEFAULT_SERVE_STALE,
+    DEFAULT_STALE_BUDGET_DAYS,
+    DOMAIN,
+    MAX_PARALLEL_FLATS,
+    MAX_STALE_BUDGET_DAYS,
+)
+from .handoff import IstaVdmHandoff, async_store_handoff
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,16 +40,24 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_EMAIL): str,
         vol.Required(CONF_PASSWORD): str,
+        vol.Optional(CONF_CHECK_DATA, default=False): bool,
     }
 )
 
 
-async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
+async def validate_input(
+    hass: HomeAssistant, data: dict[str, Any], check_data: bool = False
+) -> dict[str, Any]:
     """Validate the user input allows us to connect.
     
+    By default only the token exchange and the flat lookup that are part of
+    the login are checked. The consumption download is deferred to the
+    first refresh of the new entry, which reuses the validated client.
+    
     Args:
         hass: Home Assistant instance
         data: User input data
+        check_data: Also download the consumption data and flat info
         
     Returns:
         Dictionary with validated data
@@ -39,24 +66,43 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         CannotConnect: If connection fails
         InvalidAuth: If authentication fails
     """
-    api = IstaVdmAPI(data[CONF_EMAIL], data[CONF_PASSWORD])
+    await async_import_library(hass)
+    from ista_vdm_api import IstaVdmAPI, IstaVdmAuthError
+
+    # Pooled connections from HA, own cookie jar for the Keycloak login
+    session = async_create_clientsession(hass, auto_cleanup=False)
+    api = IstaVdmAPI(data[CONF_EMAIL], data[CONF_PASSWORD], session)
+    handed_off = False
     
     try:
-        async with api:
-            if not await api.authenticate():
-                raise InvalidAuth
-            
+        if not await api.authenticate():
+            raise InvalidAuth
+        
+        consumption_data = None
+        flat_info = None
+        if check_data:
             # Get consumption data to verify everything works
             consumption_data = await api.get_consumption_data()
+            flat_info = await api.get_flat_info()
             
             if not consumption_data:
                 _LOGGER.warning("No consumption data found, but authentication successful")
-            
-            return {
-                "title": f"Ista VDM ({data[CONF_EMAIL]})",
-                "flat_id": api.flat_id,
-                "user_id": api.user_id,
-            }
+        
+        # Let entry setup reuse the client and data instead of fetching again
+        async_store_handoff(
+            hass,
+            data[CONF_EMAIL],
+            IstaVdmHandoff(api, session, consumption_data, flat_info),
+        )
+        handed_off = True
+        
+        return {
+            "title": f"Ista VDM ({data[CONF_EMAIL]})",
+            "flat_id": api.flat_id,
+            "user_id": api.user_id,
+        }
+    except InvalidAuth:
+        raise
     except IstaVdmAuthError as e:
         _LOGGER.error(f"Authentication error: {e}")
         raise InvalidAuth from e
@@ -66,6 +112,9 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     except Exception as e:
         _LOGGER.exception(f"Unexpected error: {e}")
         raise CannotConnect from e
+    finally:
+        if not handed_off:
+            session.detach()
 
 
 class IstaVDMConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -83,8 +132,15 @@ class IstaVDMConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             await self.async_set_unique_id(user_input[CONF_EMAIL])
             self._abort_if_unique_id_configured()
             
+            # Only the credentials are stored in the entry
+            data = {
+                CONF_EMAIL: user_input[CONF_EMAIL],
+                CONF_PASSWORD: user_input[CONF_PASSWORD],
+            }
             try:
-                info = await validate_input(self.hass, user_input)
+                info = await validate_input(
+                    self.hass, data, user_input.get(CONF_CHECK_DATA, False)
+                )
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -93,7 +149,7 @@ class IstaVDMConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                return self.async_create_entry(title=info["title"], data=data)
         
         return self.async_show_form(
             step_id="user",
@@ -172,9 +228,49 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
+        options = self.config_entry.options
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema({}),
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_HISTORY_MONTHS,
+                        default=options.get(
+                            CONF_HISTORY_MONTHS, DEFAULT_HISTORY_MONTHS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_COMPACT_HISTORY,
+                        default=options.get(
+                            CONF_COMPACT_HISTORY, DEFAULT_COMPACT_HISTORY
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MAX_PARALLEL_FLATS,
+                        default=options.get(
+                            CONF_MAX_PARALLEL_FLATS, DEFAULT_MAX_PARALLEL_FLATS
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL_FLATS)
+                    ),
+                    vol.Optional(
+                        CONF_SERVE_STALE,
+                        default=options.get(CONF_SERVE_STALE, DEFAULT_SERVE_STALE),
+                    ): bool,
+                    vol.Optional(
+                        CONF_STALE_BUDGET_DAYS,
+                        default=options.get(
+                            CONF_STALE_BUDGET_DAYS, DEFAULT_STALE_BUDGET_DAYS
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=MAX_STALE_BUDGET_DAYS)
+                    ),
+                    vol.Optional(
+                        CONF_FAST_START,
+                        default=options.get(CONF_FAST_START, DEFAULT_FAST_START),
+                    ): bool,
+                }
+            ),
         )
 
 
@@ -8,14 +8,79 @@ PLATFORMS: list[Platform] = [Platform.SENSOR]
 # Configuration keys
 CONF_EMAIL = "email"
 CONF_PASSWORD = "password"
+CONF_FLAT_ID = "flat_id"  # flat keeping the unique ids of single-flat setups
+CONF_CHECK_DATA = "check_data"  # config flow only, not stored in the entry
+
+# Option keys
+CONF_HISTORY_MONTHS = "history_months"
+CONF_COMPACT_HISTORY = "compact_history"
+CONF_MAX_PARALLEL_FLATS = "max_parallel_flats"
+CONF_SERVE_STALE = "serve_stale"
+CONF_STALE_BUDGET_DAYS = "stale_budget_days"
+CONF_FAST_START = "fast_start"
+
+# Service action fields
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+
+DEFAULT_HISTORY_MONTHS = 0  # all months
+DEFAULT_COMPACT_HISTORY = False
+DEFAULT_MAX_PARALLEL_FLATS = 4  # concurrent per-flat fetches
+MAX_PARALLEL_FLATS = 16
+DEFAULT_SERVE_STALE = False
+DEFAULT_STALE_BUDGET_DAYS = 7  # days of failed refreshes served from the last data
+MAX_STALE_BUDGET_DAYS = 60
+DEFAULT_FAST_START = False
 
 # Update interval (once per day since data is only updated monthly)
 UPDATE_INTERVAL = 86400  # 24 hours in seconds
 
+# Adaptive polling around the monthly publication of the previous month
+UPDATE_INTERVAL_FAST = 8 * 3600  # inside the publication window
+UPDATE_INTERVAL_IDLE = 7 * 86400  # once the new month has been seen
+DEFAULT_PUBLICATION_DAY = 5  # until a publication has been observed
+PUBLICATION_WINDOW_BEFORE = 1  # days
+PUBLICATION_WINDOW_AFTER = 3  # days
+
+# Refreshes of all entries are spread over a repeating window, each entry
+# at its own offset, and only a few of them run at once
+REFRESH_WINDOW = 3600  # seconds
+MAX_CONCURRENT_REFRESHES = 2
+
+# Retries of transient portal errors (timeouts, 429, 5xx) within a refresh
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2  # seconds, doubled per attempt
+RETRY_MAX_DELAY = 30  # seconds
+
+# Delay after a failed refresh, doubled per failure up to UPDATE_INTERVAL
+FAILED_REFRESH_DELAY = 300  # seconds
+
+# Consecutive transient failures, across all entries, that open the circuit
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_DURATION = 900  # seconds
+
+# Number of most recent known periods re-taken from each fetch (corrections)
+DELTA_SYNC_OVERLAP = 2
+
+# Pages of the ista_vdm/history websocket command
+HISTORY_PAGE_SIZE = 12  # months
+HISTORY_MAX_PAGE_SIZE = 120  # months
+
+# Flat information (address, size) rarely changes
+FLAT_INFO_UPDATE_INTERVAL = 30 * 86400  # seconds
+
 # Default sensor names
 DEFAULT_NAME = "Ista VDM"
 
 # API Constants
 BASE_URL = "https://ista-vdm.at"
 LOGIN_URL = "https://login.ista.com/realms/vdm/protocol/openid-connect/auth"
-TOKEN_URL = "https://login.ista.com/realms/vdm/protocol/openid-connect/token"
\ No newline at end of file
+TOKEN_URL = "https://login.ista.com/realms/vdm/protocol/openid-connect/token"
+CLIENT_ID = "vdm-frontend"
+
+# Storage
+STORAGE_VERSION = 1
+TOKEN_SAVE_DELAY = 10  # seconds
+CACHE_SAVE_DELAY = 10  # seconds
+
+# How long a client validated by the config flow waits for entry setup
+HANDOFF_TTL = 300  # seconds
@@ -0,0 +1,507 @@
+"""Data update coordinator for the ista VDM integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .client import async_fetch_flat, async_get_flat_ids
+from .const import (
+    CONF_FLAT_ID,
+    CONF_SERVE_STALE,
+    CONF_STALE_BUDGET_DAYS,
+    DEFAULT_SERVE_STALE,
+    DEFAULT_STALE_BUDGET_DAYS,
+    DOMAIN,
+    FLAT_INFO_UPDATE_INTERVAL,
+    UPDATE_INTERVAL,
+)
+from .models import IstaVdmConsumptionSnapshot, IstaVdmHistoryFormat
+from .polling import IstaVdmPollingSchedule
+from .resilience import (
+    CircuitOpenError,
+    IstaVdmRefreshBackoff,
+    async_get_circuit_breaker,
+    async_retry,
+)
+from .scheduler import async_get_scheduler
+from .singleflight import async_get_single_flight
+from .statistics import IstaVdmStatisticsImporter
+from .store import IstaVdmCachedData, IstaVdmDataCache, IstaVdmTokenStore
+
+if TYPE_CHECKING:
+    from ista_vdm_api import ConsumptionData, IstaVdmAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+_DataT = TypeVar("_DataT")
+
+
+async def _async_gather_flats(
+    semaphore: asyncio.Semaphore,
+    flat_ids: Iterable[str],
+    fetch: Callable[[str], Awaitable[_T]],
+) -> dict[str, _T]:
+    """Fetch the data of several flats concurrently, in portal order.
+
+    The semaphore bounds how many requests run against the portal at once.
+    """
+
+    async def _async_fetch(flat_id: str) -> _T:
+        async with semaphore:
+            return await fetch(flat_id)
+
+    flat_ids = list(flat_ids)
+    results = await asyncio.gather(*(_async_fetch(flat_id) for flat_id in flat_ids))
+    return dict(zip(flat_ids, results))
+
+
+def _latest_period_end(
+    snapshots: dict[str, IstaVdmConsumptionSnapshot],
+) -> date | None:
+    """Return the end of the latest period of any flat."""
+    return max(
+        (
+            snapshot.latest.period_end
+            for snapshot in snapshots.values()
+            if snapshot.latest
+        ),
+        default=None,
+    )
+
+
+class IstaVdmBaseCoordinator(DataUpdateCoordinator[_DataT]):
+    """Refresh handling shared by the ista VDM coordinators.
+
+    Failed refreshes are retried with a growing delay. With the serve-stale
+    option, entities keep showing the last good data through failed
+    refreshes until it is older than the staleness budget.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: IstaVdmAPI,
+        token_store: IstaVdmTokenStore,
+        cache: IstaVdmDataCache,
+        semaphore: asyncio.Semaphore,
+        *,
+        name: str,
+        update_interval: timedelta,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=update_interval,
+            # Only notify listeners if the data changed
+            always_update=False,
+        )
+        self.api = api
+        self.token_store = token_store
+        self.cache = cache
+        self.semaphore = semaphore
+        self.scheduler = async_get_scheduler(hass)
+        self.breaker = async_get_circuit_breaker(hass)
+        self.backoff = IstaVdmRefreshBackoff(self.breaker)
+        self.single_flight = async_get_single_flight(hass)
+        options = self.config_entry.options
+        self.serve_stale: bool = options.get(CONF_SERVE_STALE, DEFAULT_SERVE_STALE)
+        self.stale_budget = timedelta(
+            days=options.get(CONF_STALE_BUDGET_DAYS, DEFAULT_STALE_BUDGET_DAYS)
+        )
+        self.last_successful_refresh: datetime | None = None
+        self._unsub_stale_expiry: CALLBACK_TYPE | None = None
+
+    @property
+    def data_age(self) -> timedelta | None:
+        """Return the time since the last successful refresh."""
+        if self.last_successful_refresh is None:
+            return None
+        return dt_util.utcnow() - self.last_successful_refresh
+
+    @property
+    def data_available(self) -> bool:
+        """Return True if entities should show the data."""
+        if self.last_update_success:
+            return True
+        return (
+            self.serve_stale
+            and (age := self.data_age) is not None
+            and age < self.stale_budget
+        )
+
+    @property
+    def serving_stale(self) -> bool:
+        """Return True while the last good data is served through failures."""
+        return not self.last_update_success and self.data_available
+
+    async def _async_get_flat_ids(self) -> list[str]:
+        """Return the flats of the account.
+
+        Both coordinators of an entry start by listing the flats, usually
+        at the same time on the first refresh, and share one request.
+        """
+        return await self.single_flight.async_do(
+            (self.api, "flats"), lambda: async_get_flat_ids(self.api)
+        )
+
+    async def _async_fetch_flat(
+        self, flat_id: str, fetch: Callable[[IstaVdmAPI], Awaitable[_T]]
+    ) -> _T:
+        """Return the data of one flat, fetched with the shared client.
+
+        The tokens are validated right before, once for all flats waiting
+        at that moment, so the request for the flat neither refreshes them
+        nor logs in on its own.
+        """
+        await self.single_flight.async_do(
+            (self.api, "token"), self.api._ensure_token_valid
+        )
+        return await async_fetch_flat(self.api, flat_id, fetch)
+
+    @callback
+    def _async_refresh_succeeded(self) -> None:
+        """Record a successful refresh."""
+        self.backoff.reset()
+        self.last_successful_refresh = dt_util.utcnow()
+        if self._unsub_stale_expiry is not None:
+            self._unsub_stale_expiry()
+            self._unsub_stale_expiry = None
+
+    @callback
+    def _async_refresh_failed(self) -> None:
+        """Record a failed refresh and retry it soon."""
+        self.update_interval = self.backoff.next_interval()
+        if not self.last_update_success:
+            # Listeners are not called for consecutive failures, keep the
+            # age shown by entities serving stale data current
+            self.async_update_listeners()
+        if (
+            self.serve_stale
+            and self._unsub_stale_expiry is None
+            and (age := self.data_age) is not None
+            and age < self.stale_budget
+        ):
+            self._unsub_stale_expiry = async_call_later(
+                self.hass, self.stale_budget - age, self._async_stale_expired
+            )
+
+    @callback
+    def _async_stale_expired(self, _now: datetime) -> None:
+        """Mark the entities unavailable once the staleness budget is spent."""
+        self._unsub_stale_expiry = None
+        if not self.last_update_success:
+            self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the staleness timer."""
+        if self._unsub_stale_expiry is not None:
+            self._unsub_stale_expiry()
+            self._unsub_stale_expiry = None
+        await super().async_shutdown()
+
+
+class IstaVdmDataUpdateCoordinator(
+    IstaVdmBaseCoordinator[dict[str, IstaVdmConsumptionSnapshot]]
+):
+    """Data update coordinator for ista VDM.
+
+    Holds one consumption snapshot per flat of the account, keyed by the
+    flat id in portal order. The flats are fetched concurrently.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: IstaVdmAPI,
+        token_store: IstaVdmTokenStore,
+        cache: IstaVdmDataCache,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            api,
+            token_store,
+            cache,
+            semaphore,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=UPDATE_INTERVAL),
+        )
+        self._prefetched: list[ConsumptionData] | None = None
+        self.history_format = IstaVdmHistoryFormat.from_options(
+            self.config_entry.options
+        )
+        # Metrics of each flat that changed with the last refresh
+        self.changed_keys: dict[str, frozenset[str]] = {}
+        self.statistics = IstaVdmStatisticsImporter(hass, self.config_entry)
+        self.polling = IstaVdmPollingSchedule()
+        # Flats registered from before the restart, until the first refresh
+        self.restored_flats: list[str] = []
+
+    @property
+    def primary_flat_id(self) -> str | None:
+        """Return the flat that keeps the unique ids of single-flat setups."""
+        return self.config_entry.data.get(CONF_FLAT_ID)
+
+    @callback
+    def async_set_prefetched(self, records: list[ConsumptionData]) -> None:
+        """Serve the client's flat from data the config flow already fetched."""
+        self._prefetched = records
+
+    @callback
+    def async_restore(self, cached: IstaVdmCachedData) -> None:
+        """Serve the last good dataset persisted before the restart.
+
+        The cached data still needs to be revalidated with a refresh.
+        """
+        self.data = {
+            flat_id: IstaVdmConsumptionSnapshot.from_records(
+                records, self.history_format
+            )
+            for flat_id, records in cached.records.items()
+        }
+        self.polling.restore(cached.publication_days, _latest_period_end(self.data))
+        self.last_successful_refresh = cached.last_refresh
+        _LOGGER.debug(
+            "Restored cached periods of %s flats for %s",
+            len(self.data),
+            self.api.email,
+        )
+
+    @callback
+    def async_restore_flats(self, flat_ids: list[str]) -> None:
+        """Register the flats known before the restart, without their data.
+
+        Their sensors show their last state until the first refresh.
+        """
+        self.restored_flats = flat_ids
+
+    async def _async_update_data(self) -> dict[str, IstaVdmConsumptionSnapshot]:
+        """Fetch data from ista VDM API."""
+        self.changed_keys = {}
+        try:
+            flat_records = await self._async_fetch()
+        except UpdateFailed:
+            # Try again soon instead of waiting for the next regular refresh
+            self._async_refresh_failed()
+            raise
+        self._async_refresh_succeeded()
+
+        if not flat_records and self.data is None:
+            _LOGGER.warning("No flats found for %s", self.api.email)
+
+        # Sort and index once per refresh so entities read in O(1). Known
+        # periods are kept and only recent or new ones are merged in.
+        # Flats that are no longer listed by the portal are dropped.
+        previous = self.data or {}
+        snapshots: dict[str, IstaVdmConsumptionSnapshot] = {}
+        for flat_id, records in flat_records.items():
+            if (known := previous.get(flat_id)) is None:
+                snapshots[flat_id] = IstaVdmConsumptionSnapshot.from_records(
+                    records, self.history_format
+                )
+            else:
+                snapshots[flat_id] = known.merge(records)
+
+        if snapshots and self.primary_flat_id is None:
+            # Pin the flat that gets the unique ids used before multi-flat
+            # support, so a reordered portal list does not swap entities
+            primary = (
+                self.api.flat_id
+                if self.api.flat_id in snapshots
+                else next(iter(snapshots))
+            )
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                data={**self.config_entry.data, CONF_FLAT_ID: primary},
+            )
+
+        for flat_id, snapshot in snapshots.items():
+            try:
+                await self.statistics.async_import(
+                    snapshot, None if flat_id == self.primary_flat_id else flat_id
+                )
+            except HomeAssistantError as err:
+                _LOGGER.warning("Failed to import long-term statistics: %s", err)
+
+        # Poll often around the expected publication, back off after it
+        now = dt_util.now()
+        self.polling.observe(now, _latest_period_end(snapshots))
+        self.changed_keys = {
+            flat_id: snapshot.changed_keys(previous.get(flat_id))
+            for flat_id, snapshot in snapshots.items()
+        }
+        if snapshots.keys() != previous.keys() or any(
+            snapshot is not previous[flat_id] for flat_id, snapshot in snapshots.items()
+        ):
+            self.cache.data.records = {
+                flat_id: list(snapshot.records)
+                for flat_id, snapshot in snapshots.items()
+            }
+            self.cache.data.publication_days = list(self.polling.observed_days)
+        # Saved on every success, the age of served data survives restarts
+        self.cache.data.last_refresh = self.last_successful_refresh
+        self.cache.async_save()
+        # Keep this entry's refreshes apart from those of other entries
+        self.update_interval = self.scheduler.next_interval(
+            self.config_entry.entry_id, now, self.polling.next_interval(now)
+        )
+        _LOGGER.debug("Next update of %s in %s", self.api.email, self.update_interval)
+
+        return snapshots
+
+    async def _async_fetch(self) -> dict[str, list[ConsumptionData]]:
+        """Fetch the consumption records of all flats from the portal."""
+        from ista_vdm_api import IstaVdmAuthError, IstaVdmError
+
+        prefetched, self._prefetched = self._prefetched, None
+
+        async def _async_fetch_flat(flat_id: str) -> list[ConsumptionData]:
+            if prefetched is not None and flat_id == self.api.flat_id:
+                return prefetched
+            return await self._async_fetch_flat(
+                flat_id, lambda api: api.get_consumption_data()
+            )
+
+        # The client authenticated during setup and logs in again on its
+        # own if a 401 cleared its tokens. The tokens are checked before
+        # the request of every flat, in case they expired while it waited.
+        async def _async_fetch_flats() -> dict[str, list[ConsumptionData]]:
+            async with self.scheduler.async_slot():
+                flat_ids = await self._async_get_flat_ids()
+                return await _async_gather_flats(
+                    self.semaphore, flat_ids, _async_fetch_flat
+                )
+
+        try:
+            # Entries of the account share the client, and with it the
+            # request of whichever refresh is already running
+            flat_records = await self.single_flight.async_do(
+                (self.api, "consumption"),
+                lambda: async_retry(self.breaker, _async_fetch_flats),
+            )
+        except (CircuitOpenError, IstaVdmAuthError, IstaVdmError) as err:
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        # The client refreshes expired tokens on its own, keep them persisted
+        self.token_store.async_save(self.api)
+
+        return flat_records
+
+
+class IstaVdmFlatInfoCoordinator(IstaVdmBaseCoordinator[dict[str, dict[str, Any]]]):
+    """Data update coordinator for the static flat information.
+
+    Address and size of a flat practically never change, so they are
+    refreshed on their own monthly schedule, and listeners are only
+    called when the information actually changed. Holds the information
+    of every flat of the account, keyed by the flat id.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: IstaVdmAPI,
+        token_store: IstaVdmTokenStore,
+        cache: IstaVdmDataCache,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            api,
+            token_store,
+            cache,
+            semaphore,
+            name=f"{DOMAIN} flat info",
+            update_interval=timedelta(seconds=FLAT_INFO_UPDATE_INTERVAL),
+        )
+        self._prefetched: dict[str, Any] | None = None
+
+    @callback
+    def async_set_prefetched(self, flat_info: dict[str, Any]) -> None:
+        """Serve the client's flat from data the config flow already fetched."""
+        self._prefetched = flat_info
+
+    @callback
+    def async_restore(self, cached: IstaVdmCachedData) -> bool:
+        """Serve the flat information persisted before the restart.
+
+        Returns True if the cached information is recent enough to skip
+        revalidating it.
+        """
+        if not cached.flat_info:
+            return False
+        self.data = dict(cached.flat_info)
+        self.last_successful_refresh = cached.flat_info_updated
+        return (
+            cached.flat_info_updated is not None
+            and dt_util.utcnow() - cached.flat_info_updated < self.update_interval
+        )
+
+    async def _async_update_data(self) -> dict[str, dict[str, Any]]:
+        """Fetch the flat information from ista VDM API."""
+        from ista_vdm_api import IstaVdmAuthError, IstaVdmError
+
+        prefetched, self._prefetched = self._prefetched, None
+
+        async def _async_fetch_flat(flat_id: str) -> dict[str, Any] | None:
+            if prefetched is not None and flat_id == self.api.flat_id:
+                return prefetched
+            return await self._async_fetch_flat(
+                flat_id, lambda api: api.get_flat_info()
+            )
+
+        async def _async_fetch_flats() -> dict[str, dict[str, Any] | None]:
+            async with self.scheduler.async_slot():
+                flat_ids = await self._async_get_flat_ids()
+                return await _async_gather_flats(
+                    self.semaphore, flat_ids, _async_fetch_flat
+                )
+
+        try:
+            fetched = await self.single_flight.async_do(
+                (self.api, "flat_info"),
+                lambda: async_retry(self.breaker, _async_fetch_flats),
+            )
+        except (CircuitOpenError, IstaVdmAuthError, IstaVdmError) as err:
+            self._async_refresh_failed()
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        self._async_refresh_succeeded()
+        self.token_store.async_save(self.api)
+
+        # The library returns None for flats whose information it failed to
+        # fetch, keep the last known information of those
+        previous = self.data or {}
+        flat_info: dict[str, dict[str, Any]] = {}
+        for flat_id, info in fetched.items():
+            if info is None:
+                info = previous.get(flat_id)
+            if info is not None:
+                flat_info[flat_id] = info
+        self.cache.data.flat_info = flat_info
+        self.cache.data.flat_info_updated = self.last_successful_refresh
+        self.cache.async_save()
+        self.update_interval = self.scheduler.next_interval(
+            self.config_entry.entry_id,
+            dt_util.now(),
+            timedelta(seconds=FLAT_INFO_UPDATE_INTERVAL),
+        )
+
+        return flat_info
@@ -8,26 +8,47 @@ from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.core import HomeAssistant
 
 from . import IstaVdmConfigEntry
+from .scheduler import refresh_offset
 
 TO_REDACT = {"password", "email"}
+# Address of a flat, from the flat information
+TO_REDACT_FLAT = {"street", "housenumber", "door", "postalcode", "flatnumber", "floor"}
 
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, entry: IstaVdmConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
-    api = entry.runtime_data
-    
-    # Get flat info if available
-    flat_info = {}
-    if hasattr(api, "_flat_info") and api._flat_info:
-        flat_info = api._flat_info
-    
+    api = entry.runtime_data.api
+    coordinator = entry.runtime_data.coordinator
+
+    # Flat info of every flat of the account, if available
+    flat_info = entry.runtime_data.flat_coordinator.data or {}
+
     return {
         "entry_data": async_redact_data(entry.data, TO_REDACT),
         "api_status": {
             "authenticated": api.is_authenticated if hasattr(api, "is_authenticated") else False,
             "flat_id": getattr(api, "_flat_id", None),
         },
-        "flat_info": flat_info,
+        "flats": {
+            flat_id: {
+                "primary": flat_id == coordinator.primary_flat_id,
+                "periods": len(snapshot),
+            }
+            for flat_id, snapshot in (coordinator.data or {}).items()
+        },
+        "flat_info": async_redact_data(flat_info, TO_REDACT_FLAT),
+        "scheduler": {
+            "refresh_offset": refresh_offset(entry.entry_id).total_seconds(),
+            **coordinator.scheduler.as_dict(),
+        },
+        "circuit_breaker": coordinator.breaker.as_dict(),
+        "single_flight": coordinator.single_flight.as_dict(),
+        "failed_refreshes": coordinator.backoff.failures,
+        "last_successful_refresh": (
+            coordinator.last_successful_refresh
+            and coordinator.last_successful_refresh.isoformat()
+        ),
+        "serving_stale": coordinator.serving_stale,
     }
\ No newline at end of file
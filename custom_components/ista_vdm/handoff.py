@@ -0,0 +1,82 @@
+"""Hand-off of validated clients from the config flow to entry setup."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, HANDOFF_TTL
+
+if TYPE_CHECKING:
+    from ista_vdm_api import ConsumptionData, IstaVdmAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_HANDOFF = f"{DOMAIN}_handoff"
+
+
+@dataclass(slots=True)
+class IstaVdmHandoff:
+    """Authenticated client and data left behind by a config flow."""
+
+    api: IstaVdmAPI
+    session: aiohttp.ClientSession
+    records: list[ConsumptionData] | None
+    flat_info: dict[str, Any] | None
+    cancel_expiry: CALLBACK_TYPE | None = None
+
+
+@callback
+def async_store_handoff(
+    hass: HomeAssistant, unique_id: str, handoff: IstaVdmHandoff
+) -> None:
+    """Keep a validated client for the entry that is about to be set up.
+
+    Unclaimed hand-offs are dropped, and their session detached, after
+    HANDOFF_TTL seconds.
+    """
+    handoffs: dict[str, IstaVdmHandoff] = hass.data.setdefault(DATA_HANDOFF, {})
+    if previous := handoffs.pop(unique_id, None):
+        _async_discard(previous)
+
+    @callback
+    def _async_expire(_now: datetime) -> None:
+        if handoffs.get(unique_id) is handoff:
+            _LOGGER.debug("Dropping unclaimed client hand-off for %s", unique_id)
+            handoff.cancel_expiry = None
+            _async_discard(handoffs.pop(unique_id))
+
+    handoff.cancel_expiry = async_call_later(hass, HANDOFF_TTL, _async_expire)
+    handoffs[unique_id] = handoff
+
+
+@callback
+def async_pop_handoff(
+    hass: HomeAssistant, unique_id: str | None, password: str
+) -> IstaVdmHandoff | None:
+    """Claim the hand-off for an entry if it was validated with its password."""
+    handoffs: dict[str, IstaVdmHandoff] = hass.data.get(DATA_HANDOFF, {})
+    if unique_id is None or (handoff := handoffs.pop(unique_id, None)) is None:
+        return None
+    if handoff.cancel_expiry is not None:
+        handoff.cancel_expiry()
+        handoff.cancel_expiry = None
+    if handoff.api.password != password:
+        _async_discard(handoff)
+        return None
+    return handoff
+
+
+@callback
+def _async_discard(handoff: IstaVdmHandoff) -> None:
+    """Release a hand-off that will not be claimed."""
+    if handoff.cancel_expiry is not None:
+        handoff.cancel_expiry()
+    handoff.session.detach()
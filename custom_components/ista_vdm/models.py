@@ -0,0 +1,249 @@
+"""Data models for the ista VDM integration."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import date
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util.read_only_dict import ReadOnlyDict
+
+from .const import (
+    CONF_COMPACT_HISTORY,
+    CONF_HISTORY_MONTHS,
+    DEFAULT_COMPACT_HISTORY,
+    DEFAULT_HISTORY_MONTHS,
+    DELTA_SYNC_OVERLAP,
+)
+
+if TYPE_CHECKING:
+    from ista_vdm_api import ConsumptionData
+
+# Record fields of the metrics exposed as sensors
+HEATING_KEY = "heating_consumption"
+HOT_WATER_KEY = "hot_water_consumption"
+METRIC_KEYS = (HEATING_KEY, HOT_WATER_KEY)
+
+# Key of the per-period value inside the ``history`` attribute
+HEATING_HISTORY_KEY = "consumption_kwh"
+HOT_WATER_HISTORY_KEY = "consumption_m3"
+
+# A rendered period: the record and the history row of each metric
+_Row = Mapping[str, Any]
+_Period = tuple["ConsumptionData", _Row, _Row]
+
+
+def _render_period(record: ConsumptionData) -> _Period:
+    """Render the history rows of both consumption metrics for a period."""
+    # Format the period once and share the strings between both metrics
+    start = record.period_start.isoformat()
+    end = record.period_end.isoformat()
+    return (
+        record,
+        ReadOnlyDict(
+            {
+                "period_start": start,
+                "period_end": end,
+                HEATING_HISTORY_KEY: record.heating_consumption,
+            }
+        ),
+        ReadOnlyDict(
+            {
+                "period_start": start,
+                "period_end": end,
+                HOT_WATER_HISTORY_KEY: record.hot_water_consumption,
+            }
+        ),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class IstaVdmHistoryFormat:
+    """How the ``history`` attribute of the consumption sensors is rendered."""
+
+    # Number of most recent months to include, 0 for all
+    months: int = DEFAULT_HISTORY_MONTHS
+    # Parallel arrays instead of one mapping per month
+    compact: bool = DEFAULT_COMPACT_HISTORY
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> IstaVdmHistoryFormat:
+        """Return the history format configured in the entry options."""
+        return cls(
+            months=options.get(CONF_HISTORY_MONTHS, DEFAULT_HISTORY_MONTHS),
+            compact=options.get(CONF_COMPACT_HISTORY, DEFAULT_COMPACT_HISTORY),
+        )
+
+
+def _render_attributes(
+    rows: tuple[_Row, ...], history_format: IstaVdmHistoryFormat, history_key: str
+) -> Mapping[str, Any]:
+    """Render the frozen state attributes for one consumption metric."""
+    if not rows:
+        return ReadOnlyDict()
+    shown = rows[: history_format.months] if history_format.months else rows
+    history: Any = shown
+    if history_format.compact:
+        # Keys once per attribute instead of once per month
+        history = ReadOnlyDict(
+            {
+                "period_start": tuple(row["period_start"] for row in shown),
+                "period_end": tuple(row["period_end"] for row in shown),
+                history_key: tuple(row[history_key] for row in shown),
+            }
+        )
+    return ReadOnlyDict(
+        {
+            "period_start": rows[0]["period_start"],
+            "period_end": rows[0]["period_end"],
+            "history": history,
+            "history_months": len(shown),
+            "total_months": len(rows),
+        }
+    )
+
+
+def _fingerprint(records: tuple[ConsumptionData, ...], key: str) -> int:
+    """Return a content hash of one metric over all periods."""
+    return hash(
+        tuple((c.period_start, c.period_end, getattr(c, key)) for c in records)
+    )
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class IstaVdmConsumptionSnapshot:
+    """Immutable view of the consumption history built once per refresh.
+
+    Records are sorted newest first and indexed by ``period_start`` so
+    entities can read the latest period or look up a month without
+    touching the raw API response again. The state attributes of both
+    consumption sensors are rendered here as well, so reading them
+    between refreshes is a plain attribute lookup.
+
+    Snapshots compare equal if the periods and values of every metric
+    match, using a content hash per metric computed once per build.
+    """
+
+    records: tuple[ConsumptionData, ...]
+    by_period: Mapping[date, ConsumptionData]
+    latest: ConsumptionData | None
+    heating_attributes: Mapping[str, Any]
+    hot_water_attributes: Mapping[str, Any]
+    # History rows of each metric, aligned with ``records``
+    heating_rows: tuple[_Row, ...] = field(repr=False)
+    hot_water_rows: tuple[_Row, ...] = field(repr=False)
+    # Content hash of each metric, keyed by the metric's record field
+    fingerprints: Mapping[str, int] = field(repr=False)
+    history_format: IstaVdmHistoryFormat = field(repr=False)
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[ConsumptionData],
+        history_format: IstaVdmHistoryFormat = IstaVdmHistoryFormat(),
+    ) -> IstaVdmConsumptionSnapshot:
+        """Build a snapshot from the records returned by the API."""
+        return cls._from_periods(
+            [_render_period(c) for c in records], history_format
+        )
+
+    @classmethod
+    def _from_periods(
+        cls, periods: list[_Period], history_format: IstaVdmHistoryFormat
+    ) -> IstaVdmConsumptionSnapshot:
+        """Build a snapshot from rendered periods."""
+        periods.sort(
+            key=lambda p: (p[0].period_start, p[0].period_end), reverse=True
+        )
+        ordered = tuple(p[0] for p in periods)
+        heating_rows = tuple(p[1] for p in periods)
+        hot_water_rows = tuple(p[2] for p in periods)
+        return cls(
+            records=ordered,
+            by_period=MappingProxyType({c.period_start: c for c in ordered}),
+            latest=ordered[0] if ordered else None,
+            heating_attributes=_render_attributes(
+                heating_rows, history_format, HEATING_HISTORY_KEY
+            ),
+            hot_water_attributes=_render_attributes(
+                hot_water_rows, history_format, HOT_WATER_HISTORY_KEY
+            ),
+            heating_rows=heating_rows,
+            hot_water_rows=hot_water_rows,
+            fingerprints=MappingProxyType(
+                {key: _fingerprint(ordered, key) for key in METRIC_KEYS}
+            ),
+            history_format=history_format,
+        )
+
+    def merge(
+        self,
+        records: Iterable[ConsumptionData],
+        overlap: int = DELTA_SYNC_OVERLAP,
+    ) -> IstaVdmConsumptionSnapshot:
+        """Merge freshly fetched records into the known history.
+
+        Known periods are kept, even if the portal stops returning them.
+        Only the last ``overlap`` known periods are re-taken from the
+        fetched records to pick up late corrections, together with new
+        periods and gaps. Every other period keeps its rendered history
+        rows, so the work per refresh does not grow with account age.
+        Returns ``self`` if nothing changed.
+        """
+        if not self.records:
+            return IstaVdmConsumptionSnapshot.from_records(
+                records, self.history_format
+            )
+
+        cutoff = self.records[min(overlap, len(self.records)) - 1].period_start
+        known: dict[date, _Period] = {
+            c.period_start: (c, heating, hot_water)
+            for c, heating, hot_water in zip(
+                self.records, self.heating_rows, self.hot_water_rows
+            )
+        }
+        changed = False
+        for record in records:
+            current = known.get(record.period_start)
+            if current is not None and (
+                record.period_start < cutoff or current[0] == record
+            ):
+                continue
+            known[record.period_start] = _render_period(record)
+            changed = True
+
+        if not changed:
+            return self
+        return IstaVdmConsumptionSnapshot._from_periods(
+            list(known.values()), self.history_format
+        )
+
+    def changed_keys(
+        self, previous: IstaVdmConsumptionSnapshot | None
+    ) -> frozenset[str]:
+        """Return the metrics whose history differs from ``previous``."""
+        if previous is None:
+            return frozenset(self.fingerprints)
+        return frozenset(
+            key
+            for key, fingerprint in self.fingerprints.items()
+            if previous.fingerprints.get(key) != fingerprint
+        )
+
+    def __eq__(self, other: object) -> bool:
+        """Return True if both snapshots hold the same consumption history."""
+        if self is other:
+            return True
+        if not isinstance(other, IstaVdmConsumptionSnapshot):
+            return NotImplemented
+        return self.fingerprints == other.fingerprints
+
+    def __hash__(self) -> int:
+        """Return the combined content hash of all metrics."""
+        return hash(tuple(self.fingerprints.values()))
+
+    def __len__(self) -> int:
+        """Return the number of periods in the snapshot."""
+        return len(self.records)
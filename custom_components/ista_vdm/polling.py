@@ -0,0 +1,102 @@
+"""Polling schedule aligned to ista's monthly publication cycle."""
+
+from __future__ import annotations
+
+import statistics
+from collections import deque
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DEFAULT_PUBLICATION_DAY,
+    PUBLICATION_WINDOW_AFTER,
+    PUBLICATION_WINDOW_BEFORE,
+    UPDATE_INTERVAL,
+    UPDATE_INTERVAL_FAST,
+    UPDATE_INTERVAL_IDLE,
+)
+
+# Number of observed publications the estimate is based on
+_HISTORY = 6
+
+
+def _clamp(delta: timedelta) -> timedelta:
+    """Clamp a delay to the fast and idle polling intervals."""
+    return min(
+        max(delta, timedelta(seconds=UPDATE_INTERVAL_FAST)),
+        timedelta(seconds=UPDATE_INTERVAL_IDLE),
+    )
+
+
+class IstaVdmPollingSchedule:
+    """Learn when a new month is published and pick the next poll interval.
+
+    ista publishes the previous month once, a few days into the next one.
+    Polls are frequent inside the expected publication window and back off
+    to at most weekly once the month has been seen.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the schedule."""
+        self.observed_days: deque[int] = deque(maxlen=_HISTORY)
+        self._latest_period_end: date | None = None
+
+    @property
+    def publication_day(self) -> int:
+        """Return the expected day of month on which a new period appears."""
+        if not self.observed_days:
+            return DEFAULT_PUBLICATION_DAY
+        return min(max(round(statistics.median(self.observed_days)), 1), 28)
+
+    def restore(
+        self, observed_days: Iterable[int], latest_period_end: date | None
+    ) -> None:
+        """Continue from the state before a restart.
+
+        Without the latest period seen before, the first refresh after a
+        restart could not tell whether its latest period is new.
+        """
+        self.observed_days.extend(observed_days)
+        self._latest_period_end = latest_period_end
+
+    def observe(self, now: datetime, latest_period_end: date | None) -> None:
+        """Record the latest period returned by a refresh."""
+        if latest_period_end is None:
+            return
+        # The first refresh without a restored state cannot tell when a
+        # period appeared
+        if (
+            self._latest_period_end is not None
+            and latest_period_end > self._latest_period_end
+        ):
+            self.observed_days.append(now.day)
+        self._latest_period_end = latest_period_end
+
+    def next_interval(self, now: datetime) -> timedelta:
+        """Return the delay until the next refresh."""
+        if self._latest_period_end is None:
+            return timedelta(seconds=UPDATE_INTERVAL)
+
+        month_start = dt_util.start_of_local_day(now.date().replace(day=1))
+        window_start = month_start + timedelta(
+            days=self.publication_day - 1 - PUBLICATION_WINDOW_BEFORE
+        )
+        window_end = month_start + timedelta(
+            days=self.publication_day - 1 + PUBLICATION_WINDOW_AFTER
+        )
+
+        if self._latest_period_end >= month_start.date() - timedelta(days=1):
+            # Last month is in, sleep until the next publication window
+            next_month = (month_start + timedelta(days=32)).replace(day=1)
+            next_window = dt_util.start_of_local_day(next_month.date()) + timedelta(
+                days=self.publication_day - 1 - PUBLICATION_WINDOW_BEFORE
+            )
+            return _clamp(next_window - now)
+        if now < window_start:
+            return _clamp(window_start - now)
+        if now <= window_end:
+            return timedelta(seconds=UPDATE_INTERVAL_FAST)
+        # Publication is late, keep checking daily
+        return timedelta(seconds=UPDATE_INTERVAL)
@@ -0,0 +1,235 @@
+"""Retries and circuit breaking for requests to the ista VDM portal."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import re
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from enum import StrEnum
+from typing import Any, TypeVar
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_DURATION,
+    DOMAIN,
+    FAILED_REFRESH_DELAY,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    UPDATE_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_CIRCUIT_BREAKER = f"{DOMAIN}_circuit_breaker"
+
+_T = TypeVar("_T")
+
+# The library reports HTTP errors only in its messages, e.g.
+# "Failed to download CSV: 502"
+_TRANSIENT_STATUS = re.compile(r"\b(?:408|425|429|5\d\d)\b")
+
+
+def is_transient(err: BaseException) -> bool:
+    """Return True if a failed request is worth retrying soon.
+
+    The library wraps every failure of a login, network errors included,
+    in IstaVdmAuthError without chaining the original as its cause, so the
+    implicit context of the error is checked as well.
+    """
+    cause: BaseException | None = err
+    while cause is not None:
+        if isinstance(cause, (aiohttp.ClientError, TimeoutError)):
+            return True
+        message = str(cause)
+        if (
+            "Network error" in message
+            or "timeout" in message.lower()
+            or _TRANSIENT_STATUS.search(message) is not None
+        ):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Return the delay before a retry, doubled per attempt.
+
+    Half of the delay is random, so clients that failed together do not
+    retry together.
+    """
+    delay = min(cap, base * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitState(StrEnum):
+    """State of the circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(HomeAssistantError):
+    """Error to indicate requests are held back during a portal outage."""
+
+
+class IstaVdmCircuitBreaker:
+    """Stop all entries from polling the portal during an outage.
+
+    After ``CIRCUIT_FAILURE_THRESHOLD`` consecutive transient failures the
+    circuit opens and requests fail right away. Once it has been open for
+    ``CIRCUIT_OPEN_DURATION`` a single request is let through; the circuit
+    closes again if it succeeds and reopens if it fails.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the circuit breaker."""
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at: datetime | None = None
+        self._probe_started: datetime | None = None
+        self.last_failure: str | None = None
+
+    @property
+    def retry_at(self) -> datetime | None:
+        """Return when the open circuit lets the next request through."""
+        if self.opened_at is None:
+            return None
+        return self.opened_at + timedelta(seconds=CIRCUIT_OPEN_DURATION)
+
+    @callback
+    def allow(self) -> bool:
+        """Return True if a request may be sent to the portal."""
+        if self.state is CircuitState.CLOSED:
+            return True
+        now = dt_util.utcnow()
+        # A probe that never reported back does not block the circuit forever
+        probe_timeout = timedelta(seconds=CIRCUIT_OPEN_DURATION)
+        if self._probe_started is not None and now < self._probe_started + probe_timeout:
+            return False
+        if self.state is CircuitState.OPEN and now < self.retry_at:
+            return False
+        _LOGGER.debug("Letting a probe request through the open circuit")
+        self.state = CircuitState.HALF_OPEN
+        self._probe_started = now
+        return True
+
+    @callback
+    def record_success(self) -> None:
+        """Record that the portal answered."""
+        if self.state is not CircuitState.CLOSED:
+            _LOGGER.info("The ista VDM portal is reachable again")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    @callback
+    def record_failure(self, err: Exception) -> None:
+        """Record a transient failure and open the circuit if needed."""
+        self.failures += 1
+        self.last_failure = str(err)
+        self._probe_started = None
+        if (
+            self.state is CircuitState.HALF_OPEN
+            or self.failures >= CIRCUIT_FAILURE_THRESHOLD
+        ):
+            if self.state is not CircuitState.OPEN:
+                _LOGGER.warning(
+                    "The ista VDM portal keeps failing, pausing requests for %s s: %s",
+                    CIRCUIT_OPEN_DURATION,
+                    err,
+                )
+            self.state = CircuitState.OPEN
+            self.opened_at = dt_util.utcnow()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the circuit for diagnostics."""
+        retry_at = self.retry_at
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "last_failure": self.last_failure,
+            "opened_at": self.opened_at and self.opened_at.isoformat(),
+            "retry_at": retry_at and retry_at.isoformat(),
+        }
+
+
+@callback
+def async_get_circuit_breaker(hass: HomeAssistant) -> IstaVdmCircuitBreaker:
+    """Return the circuit breaker shared by all config entries."""
+    if (breaker := hass.data.get(DATA_CIRCUIT_BREAKER)) is None:
+        breaker = hass.data[DATA_CIRCUIT_BREAKER] = IstaVdmCircuitBreaker()
+    return breaker
+
+
+async def async_retry(
+    breaker: IstaVdmCircuitBreaker, call: Callable[[], Awaitable[_T]]
+) -> _T:
+    """Run ``call``, retrying transient errors with exponential backoff.
+
+    Errors that are not transient are raised right away. Raises
+    CircuitOpenError without calling the portal while the circuit is open.
+    """
+    from ista_vdm_api import IstaVdmAuthError, IstaVdmError
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(
+                f"Portal unavailable, next attempt after {breaker.retry_at}"
+            )
+        try:
+            result = await call()
+        except (IstaVdmAuthError, IstaVdmError) as err:
+            if not is_transient(err):
+                # The portal answered, for an auth error the credentials
+                # are the problem
+                breaker.record_success()
+                raise
+            breaker.record_failure(err)
+            attempt += 1
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            delay = backoff_delay(attempt - 1, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+            _LOGGER.debug("Retrying in %.1f s after: %s", delay, err)
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+
+
+class IstaVdmRefreshBackoff:
+    """Pick the delay after failed refreshes of a coordinator.
+
+    The first failed refresh is retried after ``FAILED_REFRESH_DELAY``,
+    each further one after twice the previous delay, up to the regular
+    ``UPDATE_INTERVAL``. An open circuit pushes the retry past its reopening.
+    """
+
+    def __init__(self, breaker: IstaVdmCircuitBreaker) -> None:
+        """Initialize the backoff."""
+        self.breaker = breaker
+        self.failures = 0
+
+    def next_interval(self) -> timedelta:
+        """Record a failed refresh and return the delay until the next one."""
+        delay = backoff_delay(self.failures, FAILED_REFRESH_DELAY, UPDATE_INTERVAL)
+        self.failures += 1
+        if (retry_at := self.breaker.retry_at) is not None:
+            delay = max(delay, (retry_at - dt_util.utcnow()).total_seconds())
+        return timedelta(seconds=delay)
+
+    def reset(self) -> None:
+        """Record a successful refresh."""
+        self.failures = 0
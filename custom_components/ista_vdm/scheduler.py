@@ -0,0 +1,83 @@
+"""Integration-wide scheduling of ista VDM refreshes."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, MAX_CONCURRENT_REFRESHES, REFRESH_WINDOW
+
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+
+
+def refresh_offset(entry_id: str) -> timedelta:
+    """Return the fixed offset of an entry inside the refresh window.
+
+    Derived from a hash of the entry id, so it is the same on every start.
+    """
+    digest = hashlib.sha256(entry_id.encode()).digest()
+    return timedelta(seconds=int.from_bytes(digest[:8], "big") % REFRESH_WINDOW)
+
+
+class IstaVdmRefreshScheduler:
+    """Spread the refreshes of all entries and cap how many run at once.
+
+    Every entry refreshes at its own offset inside a repeating window, so
+    entries set up together, for example at startup, do not all poll the
+    portal in the same second once their timers run out. Refreshes and
+    logins beyond the cap wait in a queue.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_REFRESHES) -> None:
+        """Initialize the scheduler."""
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.running = 0
+        self.queued = 0
+
+    def next_interval(
+        self, entry_id: str, now: datetime, interval: timedelta
+    ) -> timedelta:
+        """Return ``interval`` stretched to the entry's next slot.
+
+        The result is at least ``interval`` and at most one window longer.
+        """
+        due = now.timestamp() + interval.total_seconds()
+        offset = refresh_offset(entry_id).total_seconds()
+        return interval + timedelta(seconds=(offset - due) % REFRESH_WINDOW)
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """Wait until fewer than ``max_concurrent`` refreshes are running."""
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the state of the queue for diagnostics."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": self.running,
+            "queued": self.queued,
+        }
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> IstaVdmRefreshScheduler:
+    """Return the scheduler shared by all config entries."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = IstaVdmRefreshScheduler()
+    return scheduler
@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-import logging
-from datetime import date, datetime, timedelta
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
@@ -14,104 +15,158 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfEnergy, UnitOfVolume
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
-from homeassistant.util import dt as dt_util
-
-from ista_vdm_api import ConsumptionData, IstaVdmAPI, IstaVdmError
+from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import IstaVdmConfigEntry
-from .const import DOMAIN, PLATFORMS, UPDATE_INTERVAL
+from .const import DOMAIN
+from .coordinator import (
+    IstaVdmBaseCoordinator,
+    IstaVdmDataUpdateCoordinator,
+    IstaVdmFlatInfoCoordinator,
+)
+from .models import HEATING_KEY, HOT_WATER_KEY, IstaVdmConsumptionSnapshot
 
 # Parallel updates - set to 0 to allow parallel updates
 PARALLEL_UPDATES = 0
 
-_LOGGER = logging.getLogger(__name__)
-
-
-class IstaVdmDataUpdateCoordinator(DataUpdateCoordinator[list[ConsumptionData]]):
-    """Data update coordinator for ista VDM."""
-
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        api: IstaVdmAPI,
-    ) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=UPDATE_INTERVAL),
-        )
-        self.api = api
-        self.flat_info: dict[str, Any] | None = None
-
-    async def _async_update_data(self) -> list[ConsumptionData]:
-        """Fetch data from ista VDM API."""
-        try:
-            async with self.api:
-                if not self.api.is_authenticated:
-                    await self.api.authenticate()
-                
-                # Get flat info for static sensors (only once)
-                if self.flat_info is None:
-                    self.flat_info = await self.api.get_flat_info()
-                
-                # Get all consumption data
-                return await self.api.get_consumption_data()
-                
-        except IstaVdmError as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
-
 
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: IstaVdmConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up ista VDM sensor based on a config entry."""
-    api = entry.runtime_data
-    
-    coordinator = IstaVdmDataUpdateCoordinator(hass, api)
-    
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
-    
-    # Create device info from flat info
-    device_info = _create_device_info(coordinator.flat_info, entry)
-    
-    # Create sensors
-    entities: list[IstaVdmBaseSensor] = [
-        IstaVdmHeatingSensor(coordinator, entry, device_info),
-        IstaVdmHotWaterSensor(coordinator, entry, device_info),
-    ]
-    
-    # Add flat detail sensors (static info)
-    if coordinator.flat_info:
-        entities.extend([
-            IstaVdmFlatCitySensor(coordinator, entry, device_info),
-            IstaVdmFlatStreetSensor(coordinator, entry, device_info),
-            IstaVdmFlatHouseNumberSensor(coordinator, entry, device_info),
-            IstaVdmFlatDoorSensor(coordinator, entry, device_info),
-            IstaVdmFlatSquareMeterSensor(coordinator, entry, device_info),
-            IstaVdmFlatPostalCodeSensor(coordinator, entry, device_info),
-        ])
-    
-    async_add_entities(entities)
+    """Set up ista VDM sensor based on a config entry.
+
+    Every flat of the account gets its own device. Devices and entities of
+    flats that show up later are added on the fly, the ones of flats the
+    portal no longer lists are removed. In fast-start mode, the flats known
+    before the restart get their entities before the first refresh.
+    """
+    coordinator = entry.runtime_data.coordinator
+    flat_coordinator = entry.runtime_data.flat_coordinator
+    consumption_flats: set[str] = set()
+    detail_flats: set[str] = set()
+
+    @callback
+    def _async_add_flat_sensors() -> None:
+        """Add the detail sensors of flats whose information is known.
+
+        Until the consumption data is in, the flats known before the restart
+        are used, so the detail sensors do not depend on which of the two
+        deferred refreshes finishes first, or on both succeeding.
+        """
+        flat_info = flat_coordinator.data or {}
+        entities: list[SensorEntity] = []
+        for flat_id in coordinator.data or coordinator.restored_flats:
+            if flat_id in detail_flats or flat_id not in flat_info:
+                continue
+            detail_flats.add(flat_id)
+            primary = flat_id == coordinator.primary_flat_id
+            device_info = _create_device_info(
+                flat_info[flat_id], entry, flat_id, primary
+            )
+            entities.extend(
+                IstaVdmFlatSensor(
+                    flat_coordinator, description, entry, device_info, flat_id, primary
+                )
+                for description in FLAT_SENSORS
+            )
+        if entities:
+            async_add_entities(entities)
+
+    @callback
+    def _async_add_consumption_sensors(flat_ids: Iterable[str]) -> list[str]:
+        """Add the consumption sensors of flats that have none yet."""
+        flat_info = flat_coordinator.data or {}
+        new_flats = [
+            flat_id for flat_id in flat_ids if flat_id not in consumption_flats
+        ]
+        entities: list[SensorEntity] = []
+        for flat_id in new_flats:
+            primary = flat_id == coordinator.primary_flat_id
+            device_info = _create_device_info(
+                flat_info.get(flat_id), entry, flat_id, primary
+            )
+            entities.extend(
+                IstaVdmSensor(
+                    coordinator, description, entry, device_info, flat_id, primary
+                )
+                for description in CONSUMPTION_SENSORS
+            )
+        if entities:
+            async_add_entities(entities)
+        return new_flats
+
+    @callback
+    def _async_update_flats() -> None:
+        """Add the sensors of new flats and remove vanished flats."""
+        if not coordinator.data:
+            consumption_flats.update(
+                _async_add_consumption_sensors(coordinator.restored_flats)
+            )
+            _async_add_flat_sensors()
+            return
+        flat_info = flat_coordinator.data or {}
+        new_flats = _async_add_consumption_sensors(coordinator.data)
+        if consumption_flats and not flat_info.keys() >= set(new_flats):
+            # Fetch the details of flats added since setup without waiting
+            # for the monthly refresh
+            entry.async_create_task(hass, flat_coordinator.async_request_refresh())
+        consumption_flats.clear()
+        consumption_flats.update(coordinator.data)
+        detail_flats.intersection_update(coordinator.data)
+        _async_add_flat_sensors()
+        _async_remove_vanished_flats(hass, entry, coordinator)
+
+    _async_update_flats()
+    entry.async_on_unload(coordinator.async_add_listener(_async_update_flats))
+    entry.async_on_unload(flat_coordinator.async_add_listener(_async_add_flat_sensors))
+
+
+@callback
+def _async_remove_vanished_flats(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: IstaVdmDataUpdateCoordinator,
+) -> None:
+    """Remove the devices, and with them the entities, of vanished flats."""
+    identifiers = {
+        _device_identifier(entry, flat_id, flat_id == coordinator.primary_flat_id)
+        for flat_id in coordinator.data
+    }
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if device.identifiers.isdisjoint(identifiers):
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
+
+
+def _device_identifier(
+    entry: ConfigEntry, flat_id: str, primary: bool
+) -> tuple[str, str]:
+    """Return the device identifier of a flat.
+
+    The primary flat keeps the identifier used before multi-flat support.
+    """
+    if primary:
+        return (DOMAIN, entry.entry_id)
+    return (DOMAIN, f"{entry.entry_id}_{flat_id}")
 
 
 def _create_device_info(
     flat_info: dict[str, Any] | None,
     entry: ConfigEntry,
+    flat_id: str,
+    primary: bool,
 ) -> DeviceInfo:
     """Create device info from flat information."""
+    identifiers = {_device_identifier(entry, flat_id, primary)}
     if flat_info:
         # Build address string
         address_parts = [
@@ -121,7 +176,7 @@ def _create_device_info(
         address = " ".join(filter(None, address_parts))
         
         return DeviceInfo(
-            identifiers={(DOMAIN, entry.entry_id)},
+            identifiers=identifiers,
             name=f"Ista VDM - {address}" if address else "Ista VDM",
             manufacturer="ista",
             model="VDM",
@@ -131,314 +186,255 @@ def _create_device_info(
         )
     
     return DeviceInfo(
-        identifiers={(DOMAIN, entry.entry_id)},
-        name="Ista VDM",
+        identifiers=identifiers,
+        name="Ista VDM" if primary else f"Ista VDM {flat_id}",
         manufacturer="ista",
         model="VDM",
         configuration_url="https://ista-vdm.at/",
     )
 
 
-class IstaVdmBaseSensor(CoordinatorEntity[IstaVdmDataUpdateCoordinator], SensorEntity):
-    """Base class for ista VDM sensors."""
+def _unique_id(entry: ConfigEntry, flat_id: str, primary: bool, key: str) -> str:
+    """Return the unique id of a sensor of a flat.
 
-    _attr_has_entity_name = True
-    entity_description: SensorEntityDescription
+    The primary flat keeps the unique ids used before multi-flat support.
+    """
+    if primary:
+        return f"{entry.entry_id}_{key}"
+    return f"{entry.entry_id}_{flat_id}_{key}"
 
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._entry = entry
-        self._attr_device_info = device_info
 
+def _staleness_attributes(
+    coordinator: IstaVdmBaseCoordinator[Any], attributes: Mapping[str, Any]
+) -> Mapping[str, Any]:
+    """Add the age of the data to ``attributes`` while it is served stale."""
+    if not coordinator.serving_stale:
+        return attributes
+    return {
+        **attributes,
+        "data_age": int(coordinator.data_age.total_seconds()),
+        "last_successful_refresh": coordinator.last_successful_refresh.isoformat(),
+    }
 
-class IstaVdmHeatingSensor(IstaVdmBaseSensor):
-    """Sensor for heating consumption."""
 
-    entity_description = SensorEntityDescription(
-        key="heating_consumption",
-        name="Heating Consumption",
-        device_class=SensorDeviceClass.ENERGY,
-        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
-        state_class=SensorStateClass.TOTAL,
-        icon="mdi:radiator",
-    )
+@dataclass(frozen=True, kw_only=True)
+class IstaVdmSensorEntityDescription(SensorEntityDescription):
+    """Describes an ista VDM consumption sensor."""
 
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the heating sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_heating_consumption"
+    value_fn: Callable[[IstaVdmConsumptionSnapshot], StateType]
+    attrs_fn: Callable[[IstaVdmConsumptionSnapshot], Mapping[str, Any]]
 
-    @property
-    def native_value(self) -> float | None:
-        """Return the latest consumption value."""
-        if self.coordinator.data:
-            latest = max(self.coordinator.data, key=lambda x: x.period_end)
-            return latest.heating_consumption
-        return None
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return historical data in attributes."""
-        attrs: dict[str, Any] = {}
-        
-        if self.coordinator.data:
-            sorted_data = sorted(
-                self.coordinator.data, key=lambda x: x.period_start, reverse=True
-            )
-            
-            latest = sorted_data[0]
-            attrs["period_start"] = latest.period_start.isoformat()
-            attrs["period_end"] = latest.period_end.isoformat()
-            
-            history = [
-                {
-                    "period_start": c.period_start.isoformat(),
-                    "period_end": c.period_end.isoformat(),
-                    "consumption_kwh": c.heating_consumption,
-                }
-                for c in sorted_data
-            ]
-            attrs["history"] = history
-            attrs["total_months"] = len(history)
-        
-        return attrs
+@dataclass(frozen=True, kw_only=True)
+class IstaVdmFlatSensorEntityDescription(SensorEntityDescription):
+    """Describes an ista VDM flat detail sensor."""
 
+    value_fn: Callable[[dict[str, Any]], StateType]
 
-class IstaVdmHotWaterSensor(IstaVdmBaseSensor):
-    """Sensor for hot water consumption."""
 
-    entity_description = SensorEntityDescription(
-        key="hot_water_consumption",
+CONSUMPTION_SENSORS: tuple[IstaVdmSensorEntityDescription, ...] = (
+    IstaVdmSensorEntityDescription(
+        key=HEATING_KEY,
+        name="Heating Consumption",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL,
+        icon="mdi:radiator",
+        value_fn=lambda snapshot: snapshot.latest.heating_consumption,
+        attrs_fn=lambda snapshot: snapshot.heating_attributes,
+    ),
+    IstaVdmSensorEntityDescription(
+        key=HOT_WATER_KEY,
         name="Hot Water Consumption",
         device_class=SensorDeviceClass.WATER,
         native_unit_of_measurement=UnitOfVolume.CUBIC_METERS,
         state_class=SensorStateClass.TOTAL,
         icon="mdi:water-boiler",
-    )
-
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the hot water sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_hot_water_consumption"
-
-    @property
-    def native_value(self) -> float | None:
-        """Return the latest consumption value."""
-        if self.coordinator.data:
-            latest = max(self.coordinator.data, key=lambda x: x.period_end)
-            return latest.hot_water_consumption
-        return None
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return historical data in attributes."""
-        attrs: dict[str, Any] = {}
-        
-        if self.coordinator.data:
-            sorted_data = sorted(
-                self.coordinator.data, key=lambda x: x.period_start, reverse=True
-            )
-            
-            latest = sorted_data[0]
-            attrs["period_start"] = latest.period_start.isoformat()
-            attrs["period_end"] = latest.period_end.isoformat()
-            
-            history = [
-                {
-                    "period_start": c.period_start.isoformat(),
-                    "period_end": c.period_end.isoformat(),
-                    "consumption_m3": c.hot_water_consumption,
-                }
-                for c in sorted_data
-            ]
-            attrs["history"] = history
-            attrs["total_months"] = len(history)
-        
-        return attrs
-
+        value_fn=lambda snapshot: snapshot.latest.hot_water_consumption,
+        attrs_fn=lambda snapshot: snapshot.hot_water_attributes,
+    ),
+)
 
 # Flat detail sensors (static information, diagnostic category)
-
-class IstaVdmFlatCitySensor(IstaVdmBaseSensor):
-    """Sensor for flat city."""
-
-    entity_description = SensorEntityDescription(
+FLAT_SENSORS: tuple[IstaVdmFlatSensorEntityDescription, ...] = (
+    IstaVdmFlatSensorEntityDescription(
         key="flat_city",
         name="City",
         icon="mdi:city",
         entity_category=EntityCategory.DIAGNOSTIC,
-    )
-
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_flat_city"
-
-    @property
-    def native_value(self) -> str | None:
-        """Return the state of the sensor."""
-        if self.coordinator.flat_info:
-            return self.coordinator.flat_info.get("city")
-        return None
-
-
-class IstaVdmFlatStreetSensor(IstaVdmBaseSensor):
-    """Sensor for flat street."""
-
-    entity_description = SensorEntityDescription(
+        value_fn=lambda flat_info: flat_info.get("city"),
+    ),
+    IstaVdmFlatSensorEntityDescription(
         key="flat_street",
         name="Street",
         icon="mdi:road",
         entity_category=EntityCategory.DIAGNOSTIC,
-    )
-
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_flat_street"
-
-    @property
-    def native_value(self) -> str | None:
-        """Return the state of the sensor."""
-        if self.coordinator.flat_info:
-            return self.coordinator.flat_info.get("street")
-        return None
-
-
-class IstaVdmFlatHouseNumberSensor(IstaVdmBaseSensor):
-    """Sensor for flat house number."""
-
-    entity_description = SensorEntityDescription(
+        value_fn=lambda flat_info: flat_info.get("street"),
+    ),
+    IstaVdmFlatSensorEntityDescription(
         key="flat_housenumber",
         name="House Number",
         icon="mdi:numeric",
         entity_category=EntityCategory.DIAGNOSTIC,
-    )
-
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_flat_housenumber"
-
-    @property
-    def native_value(self) -> str | None:
-        """Return the state of the sensor."""
-        if self.coordinator.flat_info:
-            return self.coordinator.flat_info.get("housenumber")
-        return None
-
-
-class IstaVdmFlatDoorSensor(IstaVdmBaseSensor):
-    """Sensor for flat door number."""
-
-    entity_description = SensorEntityDescription(
+        value_fn=lambda flat_info: flat_info.get("housenumber"),
+    ),
+    IstaVdmFlatSensorEntityDescription(
         key="flat_door",
         name="Door",
         icon="mdi:door",
         entity_category=EntityCategory.DIAGNOSTIC,
-    )
-
-    def __init__(
-        self,
-        coordinator: IstaVdmDataUpdateCoordinator,
-        entry: ConfigEntry,
-        device_info: DeviceInfo,
-    ) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_flat_door"
-
-    @property
-    def native_value(self) -> str | None:
-        """Return the state of the sensor."""
-        if self.coordinator.flat_info:
-            return self.coordinator.flat_info.get("door")
-        return None
-
-
-class IstaVdmFlatSquareMeterSensor(IstaVdmBaseSensor):
-    """Sensor for flat square meters."""
-
-    entity_description = SensorEntityDescription(
+        value_fn=lambda flat_info: flat_info.get("door"),
+    ),
+    IstaVdmFlatSensorEntityDescription(
         key="flat_squaremeter",
         name="Square Meters",
         icon="mdi:ruler-square",
         native_unit_of_measurement="m²",
         entity_category=EntityCategory.DIAGNOSTIC,
-    )
+        value_fn=lambda flat_info: flat_info.get("squaremeter"),
+    ),
+    IstaVdmFlatSensorEntityDescription(
+        key="flat_postalcode",
+        name="Postal Code",
+        icon="mdi:mailbox",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda flat_info: flat_info.get("postalcode"),
+    ),
+)
+
+
+class IstaVdmSensor(CoordinatorEntity[IstaVdmDataUpdateCoordinator], RestoreSensor):
+    """Consumption sensor of a flat."""
+
+    _attr_has_entity_name = True
+    # The history can hold hundreds of months, keep it out of the recorder
+    _unrecorded_attributes = frozenset({"history", "history_months", "data_age"})
+    entity_description: IstaVdmSensorEntityDescription
 
     def __init__(
         self,
         coordinator: IstaVdmDataUpdateCoordinator,
+        description: IstaVdmSensorEntityDescription,
         entry: ConfigEntry,
         device_info: DeviceInfo,
+        flat_id: str,
+        primary: bool = True,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_flat_squaremeter"
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._flat_id = flat_id
+        self._attr_device_info = device_info
+        self._attr_unique_id = _unique_id(entry, flat_id, primary, description.key)
+        self._written_available = True
+        self._written_stale = False
+        self._restored_value: StateType = None
 
     @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        if self.coordinator.flat_info:
-            return self.coordinator.flat_info.get("squaremeter")
-        return None
+    def available(self) -> bool:
+        """Return True while there is data and the portal lists the flat."""
+        if self.coordinator.data is None:
+            # Last state from before the restart, until the first refresh
+            return (
+                self.coordinator.last_update_success
+                and self._restored_value is not None
+            )
+        return (
+            self.coordinator.data_available and self._flat_id in self.coordinator.data
+        )
 
+    @property
+    def snapshot(self) -> IstaVdmConsumptionSnapshot | None:
+        """Return the consumption snapshot of the sensor's flat."""
+        return (self.coordinator.data or {}).get(self._flat_id)
 
-class IstaVdmFlatPostalCodeSensor(IstaVdmBaseSensor):
-    """Sensor for flat postal code."""
+    @property
+    def native_value(self) -> StateType:
+        """Return the latest consumption value."""
+        if snapshot := self.snapshot:
+            return self.entity_description.value_fn(snapshot)
+        return self._restored_value
 
-    entity_description = SensorEntityDescription(
-        key="flat_postalcode",
-        name="Postal Code",
-        icon="mdi:mailbox",
-        entity_category=EntityCategory.DIAGNOSTIC,
-    )
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return historical data in attributes."""
+        if snapshot := self.snapshot:
+            # Rendered once per refresh by the coordinator and shared
+            return _staleness_attributes(
+                self.coordinator, self.entity_description.attrs_fn(snapshot)
+            )
+        return {}
+
+    async def async_added_to_hass(self) -> None:
+        """When entity is added to hass."""
+        await super().async_added_to_hass()
+        if self.coordinator.data is None and (
+            last_data := await self.async_get_last_sensor_data()
+        ):
+            self._restored_value = last_data.native_value
+        self._written_available = self.available
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if this sensor's metric or availability changed.
+
+        While stale data is served, every failed refresh writes the state
+        once to update the age of the data.
+        """
+        available = self.available
+        stale = self.coordinator.serving_stale
+        if (
+            available == self._written_available
+            and not stale
+            and not self._written_stale
+            and self.entity_description.key
+            not in self.coordinator.changed_keys.get(self._flat_id, ())
+        ):
+            return
+        self._written_available = available
+        self._written_stale = stale
+        super()._handle_coordinator_update()
+
+
+class IstaVdmFlatSensor(CoordinatorEntity[IstaVdmFlatInfoCoordinator], SensorEntity):
+    """Flat detail sensor of a flat."""
+
+    _attr_has_entity_name = True
+    _unrecorded_attributes = frozenset({"data_age"})
+    entity_description: IstaVdmFlatSensorEntityDescription
 
     def __init__(
         self,
-        coordinator: IstaVdmDataUpdateCoordinator,
+        coordinator: IstaVdmFlatInfoCoordinator,
+        description: IstaVdmFlatSensorEntityDescription,
         entry: ConfigEntry,
         device_info: DeviceInfo,
+        flat_id: str,
+        primary: bool = True,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator, entry, device_info)
-        self._attr_unique_id = f"{entry.entry_id}_flat_postalcode"
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._flat_id = flat_id
+        self._attr_device_info = device_info
+        self._attr_unique_id = _unique_id(entry, flat_id, primary, description.key)
 
     @property
-    def native_value(self) -> str | None:
+    def available(self) -> bool:
+        """Return True while there is flat information to show."""
+        return self.coordinator.data_available
+
+    @property
+    def flat_info(self) -> dict[str, Any]:
+        """Return the information of the sensor's flat."""
+        return (self.coordinator.data or {}).get(self._flat_id) or {}
+
+    @property
+    def native_value(self) -> StateType:
         """Return the state of the sensor."""
-        if self.coordinator.flat_info:
-            return self.coordinator.flat_info.get("postalcode")
-        return None
\ No newline at end of file
+        return self.entity_description.value_fn(self.flat_info)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        """Return the age of the information while it is served stale."""
+        return _staleness_attributes(self.coordinator, {})
@@ -0,0 +1,47 @@
+"""Service actions of the ista VDM integration."""
+
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import ATTR_CONFIG_ENTRY_ID, DOMAIN
+
+SERVICE_REFRESH = "refresh"
+
+SERVICE_REFRESH_SCHEMA = vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): str})
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the service actions."""
+
+    async def _async_refresh(call: ServiceCall) -> None:
+        """Refresh the consumption data of one or all entries.
+
+        Goes through the coordinators' debouncers, so a burst of calls
+        results in one refresh right away and at most one more after the
+        cooldown.
+        """
+        if (entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID)) is not None:
+            entry = hass.config_entries.async_get_entry(entry_id)
+            if entry is None or entry.domain != DOMAIN:
+                raise ServiceValidationError(f"Unknown config entry {entry_id}")
+            if entry.state is not ConfigEntryState.LOADED:
+                raise ServiceValidationError(f"Config entry {entry_id} is not loaded")
+            entries = [entry]
+        else:
+            entries = [
+                entry
+                for entry in hass.config_entries.async_entries(DOMAIN)
+                if entry.state is ConfigEntryState.LOADED
+            ]
+        for entry in entries:
+            await entry.runtime_data.coordinator.async_request_refresh()
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REFRESH, _async_refresh, schema=SERVICE_REFRESH_SCHEMA
+    )
@@ -0,0 +1,65 @@
+"""Coalescing of concurrent requests to the ista VDM portal."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_SINGLE_FLIGHT = f"{DOMAIN}_single_flight"
+
+_T = TypeVar("_T")
+
+
+class IstaVdmSingleFlight:
+    """Share one in-flight request between concurrent callers.
+
+    A reload, a reauth, manual entity updates and the scheduled poll can
+    all start a refresh at nearly the same moment. Callers asking for the
+    same key while a request is running await its result instead of
+    sending their own. The request runs in its own task, so a caller that
+    is cancelled does not cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the single flight."""
+        self._flights: dict[Hashable, asyncio.Task[Any]] = {}
+        self.coalesced = 0
+
+    async def async_do(self, key: Hashable, call: Callable[[], Awaitable[_T]]) -> _T:
+        """Return the result of ``call``, shared with concurrent callers."""
+        if (flight := self._flights.get(key)) is not None:
+            _LOGGER.debug("Joining a request already in flight")
+            self.coalesced += 1
+        else:
+            flight = self._flights[key] = asyncio.ensure_future(call())
+            flight.add_done_callback(lambda task: self._async_landed(key, task))
+        return await asyncio.shield(flight)
+
+    @callback
+    def _async_landed(self, key: Hashable, flight: asyncio.Task[Any]) -> None:
+        """Forget a finished request."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Retrieved even if every caller was cancelled meanwhile
+            flight.exception()
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the state of the single flight for diagnostics."""
+        return {"in_flight": len(self._flights), "coalesced": self.coalesced}
+
+
+@callback
+def async_get_single_flight(hass: HomeAssistant) -> IstaVdmSingleFlight:
+    """Return the single flight shared by all config entries."""
+    if (flight := hass.data.get(DATA_SINGLE_FLIGHT)) is None:
+        flight = hass.data[DATA_SINGLE_FLIGHT] = IstaVdmSingleFlight()
+    return flight
@@ -0,0 +1,201 @@
+"""Long-term statistics import for ista VDM."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfEnergy, UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import EnergyConverter, VolumeConverter
+
+from .const import DELTA_SYNC_OVERLAP, DOMAIN
+from .models import IstaVdmConsumptionSnapshot
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+
+_LOGGER = logging.getLogger(__name__)
+
+# (ConsumptionData field, statistic name, unit, unit class)
+STATISTICS: tuple[tuple[str, str, str, str], ...] = (
+    (
+        "heating_consumption",
+        "Heating Consumption",
+        UnitOfEnergy.KILO_WATT_HOUR,
+        EnergyConverter.UNIT_CLASS,
+    ),
+    (
+        "hot_water_consumption",
+        "Hot Water Consumption",
+        UnitOfVolume.CUBIC_METERS,
+        VolumeConverter.UNIT_CLASS,
+    ),
+)
+
+
+def statistic_id(entry: ConfigEntry, key: str, flat_id: str | None = None) -> str:
+    """Return the external statistic id for a consumption metric.
+
+    The primary flat of the entry is passed without a ``flat_id`` and keeps
+    the id used before multi-flat support.
+    """
+    if flat_id is None:
+        return f"{DOMAIN}:{entry.entry_id.lower()}_{key}"
+    return f"{DOMAIN}:{entry.entry_id.lower()}_{flat_id}_{key}"
+
+
+def _metadata(
+    name: str, stat_id: str, unit: str, unit_class: str
+) -> StatisticMetaData:
+    """Return the metadata of a consumption statistic.
+
+    Sets the fields of the running recorder version: ``mean_type`` replaced
+    ``has_mean`` and ``unit_class`` was added later.
+    """
+    from homeassistant.components.recorder import models
+
+    metadata = models.StatisticMetaData(
+        has_sum=True,
+        name=name,
+        source=DOMAIN,
+        statistic_id=stat_id,
+        unit_of_measurement=unit,
+    )
+    if hasattr(models, "StatisticMeanType"):
+        metadata["mean_type"] = models.StatisticMeanType.NONE
+    else:  # Home Assistant before 2025.4 only knows has_mean
+        metadata["has_mean"] = False
+    if "unit_class" in models.StatisticMetaData.__annotations__:
+        metadata["unit_class"] = unit_class
+    return metadata
+
+
+class IstaVdmStatisticsImporter:
+    """Push monthly consumption into long-term statistics.
+
+    The recorder is imported only once there is something to import, so
+    loading the integration does not load it. The last imported periods
+    and running sums of every statistic are read from the recorder once
+    and then tracked in memory. Each refresh walks
+    the periods newer than the last import and the ``DELTA_SYNC_OVERLAP``
+    most recent imported ones, which the portal may still correct. A
+    corrected period is imported again, along with every later one since
+    their sums change too.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.entry = entry
+        # statistic_id -> (start of last imported period, sum at that period)
+        self._last: dict[str, tuple[datetime | None, float]] = {}
+        # statistic_id -> start -> (state, sum) of the most recent periods
+        self._recent: dict[str, dict[datetime, tuple[float, float]]] = {}
+
+    async def async_import(
+        self, snapshot: IstaVdmConsumptionSnapshot, flat_id: str | None = None
+    ) -> None:
+        """Import the new and corrected periods of a flat."""
+        if "recorder" not in self.hass.config.components:
+            return
+        from homeassistant.components.recorder.models import StatisticData
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        for key, name, unit, unit_class in STATISTICS:
+            stat_id = statistic_id(self.entry, key, flat_id)
+            if stat_id not in self._last:
+                await self._async_load(stat_id)
+            last_start, total = self._last[stat_id]
+            recent = self._recent[stat_id]
+
+            # Records are sorted newest first, so stop at the first period
+            # that is known and too old to be corrected
+            records = itertools.takewhile(
+                lambda c: last_start is None
+                or dt_util.start_of_local_day(c.period_start) > last_start
+                or dt_util.start_of_local_day(c.period_start) in recent,
+                snapshot.records,
+            )
+            values = [
+                (dt_util.start_of_local_day(record.period_start), value)
+                for record in reversed(list(records))
+                if (value := getattr(record, key)) is not None
+            ]
+            # The oldest new or corrected period, the sums change from there
+            first = next(
+                (
+                    index
+                    for index, (start, value) in enumerate(values)
+                    if start not in recent or recent[start][0] != value
+                ),
+                None,
+            )
+            if first is None:
+                continue
+            if (known := recent.get(values[first][0])) is not None:
+                state, known_sum = known
+                total = known_sum - state
+
+            statistics: list[StatisticData] = []
+            for start, value in values[first:]:
+                total += value
+                statistics.append(StatisticData(start=start, state=value, sum=total))
+
+            _LOGGER.debug("Importing %d periods into %s", len(statistics), stat_id)
+            async_add_external_statistics(
+                self.hass,
+                _metadata(
+                    (
+                        f"{self.entry.title} {name}"
+                        if flat_id is None
+                        else f"{self.entry.title} {flat_id} {name}"
+                    ),
+                    stat_id,
+                    unit,
+                    unit_class,
+                ),
+                statistics,
+            )
+            self._last[stat_id] = (statistics[-1]["start"], total)
+            recent = {
+                start: known
+                for start, known in recent.items()
+                if start < statistics[0]["start"]
+            } | {item["start"]: (item["state"], item["sum"]) for item in statistics}
+            self._recent[stat_id] = dict(sorted(recent.items())[-DELTA_SYNC_OVERLAP:])
+
+    async def _async_load(self, stat_id: str) -> None:
+        """Load the most recent imported periods of a statistic."""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        last_stats = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics,
+            self.hass,
+            DELTA_SYNC_OVERLAP,
+            stat_id,
+            False,
+            {"state", "sum"},
+        )
+        # Newest first
+        rows = last_stats.get(stat_id) or []
+        self._last[stat_id] = (
+            (dt_util.utc_from_timestamp(rows[0]["start"]), rows[0].get("sum") or 0.0)
+            if rows
+            else (None, 0.0)
+        )
+        self._recent[stat_id] = {
+            dt_util.utc_from_timestamp(row["start"]): (row["state"], row["sum"])
+            for row in reversed(rows)
+            if row.get("state") is not None and row.get("sum") is not None
+        }
@@ -0,0 +1,227 @@
+"""Persistent storage for the ista VDM integration."""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    CACHE_SAVE_DELAY,
+    CLIENT_ID,
+    DOMAIN,
+    STORAGE_VERSION,
+    TOKEN_SAVE_DELAY,
+    TOKEN_URL,
+)
+
+if TYPE_CHECKING:
+    from ista_vdm_api import ConsumptionData, IstaVdmAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+# Session state of IstaVdmAPI that survives a restart. The library has no
+# public accessors for its tokens, so they are read and written directly.
+_SESSION_ATTRS = (
+    "_access_token",
+    "_refresh_token",
+    "_token_expires",
+    "_flat_id",
+    "_user_id",
+)
+
+# Refresh a little before the access token actually expires
+_EXPIRY_MARGIN = 60  # seconds
+
+
+class IstaVdmTokenStore:
+    """Persist the OAuth tokens of a config entry across restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the token store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.tokens.{entry_id}", private=True
+        )
+        self._saved: dict[str, Any] | None = None
+
+    async def async_restore(self, api: IstaVdmAPI) -> bool:
+        """Restore persisted tokens into the API client.
+
+        Returns True if the client holds a valid access token afterwards,
+        refreshing it with the refresh-token grant if it has expired.
+        """
+        data = await self._store.async_load()
+        if not data or data.get("email") != api.email:
+            return False
+
+        for attr in _SESSION_ATTRS:
+            setattr(api, attr, data.get(attr))
+        self._saved = data
+
+        if api._token_expires and time.time() < api._token_expires - _EXPIRY_MARGIN:
+            _LOGGER.debug("Restored access token for %s", api.email)
+            return True
+
+        if api._refresh_token and await self._async_refresh(api):
+            _LOGGER.debug("Refreshed persisted tokens for %s", api.email)
+            self.async_save(api)
+            return True
+
+        api._access_token = None
+        api._refresh_token = None
+        return False
+
+    async def _async_refresh(self, api: IstaVdmAPI) -> bool:
+        """Exchange the refresh token for a new access token."""
+        session = await api._get_session()
+        try:
+            async with session.post(
+                TOKEN_URL,
+                data={
+                    "grant_type": "refresh_token",
+                    "client_id": CLIENT_ID,
+                    "refresh_token": api._refresh_token,
+                },
+            ) as response:
+                if response.status != 200:
+                    _LOGGER.debug("Refresh token rejected: %s", response.status)
+                    return False
+                tokens = await response.json()
+        except (aiohttp.ClientError, TimeoutError) as err:
+            _LOGGER.debug("Token refresh failed: %s", err)
+            return False
+
+        if not (access_token := tokens.get("access_token")):
+            return False
+        api._access_token = access_token
+        api._refresh_token = tokens.get("refresh_token")
+        api._token_expires = time.time() + tokens.get("expires_in", 300)
+        return True
+
+    @callback
+    def async_save(self, api: IstaVdmAPI) -> None:
+        """Schedule saving the tokens of the client if they changed."""
+        data = {"email": api.email} | {
+            attr: getattr(api, attr) for attr in _SESSION_ATTRS
+        }
+        if data == self._saved:
+            return
+        self._saved = data
+        self._store.async_delay_save(lambda: data, TOKEN_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Remove the persisted tokens."""
+        await self._store.async_remove()
+
+
+@dataclass(slots=True)
+class IstaVdmCachedData:
+    """Last good dataset of a config entry, per flat of the account."""
+
+    records: dict[str, list[ConsumptionData]] = field(default_factory=dict)
+    flat_info: dict[str, dict[str, Any]] = field(default_factory=dict)
+    flat_info_updated: datetime | None = None
+    publication_days: list[int] = field(default_factory=list)
+    last_refresh: datetime | None = None
+
+
+def _encode_record(record: ConsumptionData) -> dict[str, Any]:
+    """Return a JSON serializable form of a consumption record."""
+    return asdict(record) | {
+        "period_start": record.period_start.isoformat(),
+        "period_end": record.period_end.isoformat(),
+    }
+
+
+def _decode_record(data: dict[str, Any]) -> ConsumptionData:
+    """Return the consumption record stored by _encode_record."""
+    from ista_vdm_api import ConsumptionData
+
+    fields = data | {
+        "period_start": date.fromisoformat(data["period_start"]),
+        "period_end": date.fromisoformat(data["period_end"]),
+    }
+    return ConsumptionData(**fields)
+
+
+class IstaVdmDataCache:
+    """Persist the last good dataset of a config entry across restarts.
+
+    Both coordinators of an entry update their part of ``data`` and
+    schedule a save of the whole dataset.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the data cache."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.cache.{entry_id}", private=True
+        )
+        self.data = IstaVdmCachedData()
+
+    async def async_load(self) -> bool:
+        """Load the cached dataset.
+
+        Returns True if it holds consumption records to start from.
+        """
+        if not (data := await self._store.async_load()):
+            return False
+        try:
+            flats: dict[str, dict[str, Any]] = data["flats"]
+            updated = data.get("flat_info_updated")
+            last_refresh = data.get("last_refresh")
+            self.data = IstaVdmCachedData(
+                records={
+                    flat_id: [_decode_record(record) for record in flat["records"]]
+                    for flat_id, flat in flats.items()
+                    if "records" in flat
+                },
+                flat_info={
+                    flat_id: flat["flat_info"]
+                    for flat_id, flat in flats.items()
+                    if flat.get("flat_info") is not None
+                },
+                flat_info_updated=updated and datetime.fromisoformat(updated),
+                publication_days=list(data.get("publication_days", [])),
+                last_refresh=last_refresh and datetime.fromisoformat(last_refresh),
+            )
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.debug("Ignoring unreadable data cache: %s", err)
+            return False
+        return bool(self.data.records)
+
+    @callback
+    def async_save(self) -> None:
+        """Schedule saving the dataset."""
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the dataset to store."""
+        updated = self.data.flat_info_updated
+        last_refresh = self.data.last_refresh
+        # Either part may be known for a flat without the other, e.g. the
+        # information of a flat whose consumption download failed
+        flats: dict[str, dict[str, Any]] = {}
+        for flat_id, records in self.data.records.items():
+            flats.setdefault(flat_id, {})["records"] = [
+                _encode_record(record) for record in records
+            ]
+        for flat_id, flat_info in self.data.flat_info.items():
+            flats.setdefault(flat_id, {})["flat_info"] = flat_info
+        return {
+            "flats": flats,
+            "flat_info_updated": updated and updated.isoformat(),
+            "publication_days": self.data.publication_days,
+            "last_refresh": last_refresh and last_refresh.isoformat(),
+        }
+
+    async def async_remove(self) -> None:
+        """Remove the cached dataset."""
+        await self._store.async_remove()
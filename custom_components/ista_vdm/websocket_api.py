@@ -0,0 +1,103 @@
+"""Websocket API for the ista VDM integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, HISTORY_MAX_PAGE_SIZE, HISTORY_PAGE_SIZE
+from .models import HEATING_KEY, HOT_WATER_KEY
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, ws_history)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/history",
+        vol.Required("entry_id"): str,
+        vol.Optional("flat_id"): str,
+        vol.Optional("metric", default=HEATING_KEY): vol.In(
+            (HEATING_KEY, HOT_WATER_KEY)
+        ),
+        vol.Optional("start"): cv.date,
+        vol.Optional("end"): cv.date,
+        vol.Optional("offset", default=0): vol.All(int, vol.Range(min=0)),
+        vol.Optional("page_size", default=HISTORY_PAGE_SIZE): vol.All(
+            int, vol.Range(min=1, max=HISTORY_MAX_PAGE_SIZE)
+        ),
+    }
+)
+@callback
+def ws_history(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return one page of the consumption history of a flat of an entry.
+
+    Without a ``flat_id`` the entry's primary flat is used. Periods are
+    returned newest first, optionally limited to the ones starting between
+    ``start`` and ``end``. The rows are the ones rendered
+    for the sensor attributes, so serving a page does not touch the portal
+    or format any data.
+    """
+    entry = hass.config_entries.async_get_entry(msg["entry_id"])
+    if (
+        entry is None
+        or entry.domain != DOMAIN
+        or entry.state is not ConfigEntryState.LOADED
+    ):
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not loaded"
+        )
+        return
+
+    coordinator = entry.runtime_data.coordinator
+    flat_id = msg.get("flat_id", coordinator.primary_flat_id)
+    if coordinator.data and flat_id not in coordinator.data:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Unknown flat"
+        )
+        return
+
+    snapshot = (coordinator.data or {}).get(flat_id)
+    if not snapshot:
+        connection.send_result(
+            msg["id"], {"history": [], "total": 0, "next_offset": None}
+        )
+        return
+
+    rows = (
+        snapshot.heating_rows
+        if msg["metric"] == HEATING_KEY
+        else snapshot.hot_water_rows
+    )
+    start, end = msg.get("start"), msg.get("end")
+    if start is not None or end is not None:
+        rows = tuple(
+            row
+            for record, row in zip(snapshot.records, rows)
+            if (start is None or record.period_start >= start)
+            and (end is None or record.period_start <= end)
+        )
+
+    offset, page_size = msg["offset"], msg["page_size"]
+    next_offset = offset + page_size
+    connection.send_result(
+        msg["id"],
+        {
+            "history": rows[offset:next_offset],
+            "total": len(rows),
+            "next_offset": next_offset if next_offset < len(rows) else None,
+        },
+    )
@@ -0,0 +1 @@
+"""Tests for the ista VDM integration."""
@@ -0,0 +1,180 @@
+"""Fixtures for ista VDM tests."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import AsyncGenerator
+from unittest.mock import AsyncMock
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from ista_vdm_api import api as ista_api
+
+from custom_components.ista_vdm import store
+
+CSV_EXPORT = """\
+Monat;Wärme (kWh)
+November 2025;327,8
+Dezember 2025;392,1
+Monat;Warmwasser (m³)
+November 2025;0,29
+Dezember 2025;0,26
+"""
+
+LOGIN_PAGE = """\
+<html><body>
+<form id="kc-form-login" action="{action}" method="post">
+<input name="username"><input name="password" type="password">
+</form>
+</body></html>
+"""
+
+
+def mock_api_client(flat_id: str = "1") -> AsyncMock:
+    """Return a mocked API client whose session state can be persisted."""
+    api = AsyncMock()
+    api.email = "test@example.com"
+    api.flat_id = api._flat_id = flat_id
+    api._user_id = "2"
+    api._access_token = "access"
+    api._refresh_token = "refresh"
+    api._token_expires = 0.0
+    return api
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable custom integrations defined in the test dir."""
+    yield
+
+
+class FakeIstaServer:
+    """Local stand-in for the ista login realm and VDM portal.
+
+    Counts requests per endpoint and per path, the TCP connections they arrived on and
+    the most requests in flight at once. Can delay every response to
+    simulate a slow portal, and fail a number of requests per endpoint
+    with a 502 to simulate an outage.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the fake server."""
+        self.url = ""
+        self.password = "password"
+        self.csv = CSV_EXPORT
+        self.flats = [1]
+        self.delay = 0.0
+        self.calls: Counter[str] = Counter()
+        self.paths: Counter[str] = Counter()
+        self.connections: set[tuple[str, int]] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures: Counter[str] = Counter()
+
+    def app(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/auth", self._login_page, name="login_page")
+        app.router.add_post("/login-action", self._login, name="login")
+        app.router.add_post("/token", self._token, name="token")
+        app.router.add_get("/api/flats", self._flats, name="flats")
+        app.router.add_get("/api/flats/{flat_id}", self._flat, name="flat")
+        app.router.add_get("/api/flats/{flat_id}/export", self._export, name="export")
+        app.router.add_get("/download/{flat_id}.csv", self._download, name="download")
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        """Record the request and apply the configured delay or failure."""
+        self.connections.add(request.transport.get_extra_info("peername"))
+        route = request.match_info.route.name
+        self.calls[route] += 1
+        self.paths[request.path] += 1
+        if self.failures[route] > 0:
+            self.failures[route] -= 1
+            return web.Response(status=502, text="Bad Gateway")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _login_page(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=LOGIN_PAGE.format(action=f"{self.url}/login-action"),
+            content_type="text/html",
+        )
+
+    async def _login(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if form.get("password") != self.password:
+            return web.Response(
+                text='<span id="input-error">Invalid username or password.</span>',
+                content_type="text/html",
+            )
+        return web.Response(
+            status=302, headers={"Location": f"{self.url}/login-redirect?code=abc"}
+        )
+
+    async def _token(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "access_token": f"access-{self.calls['token']}",
+                "refresh_token": f"refresh-{self.calls['token']}",
+                "expires_in": 300,
+            }
+        )
+
+    async def _flats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"data": [{"id": flat_id, "userId": 2} for flat_id in self.flats]}
+        )
+
+    async def _flat(self, request: web.Request) -> web.Response:
+        flat_id = request.match_info["flat_id"]
+        return web.json_response(
+            {
+                "data": {
+                    "id": int(flat_id),
+                    "city": "Vienna",
+                    "street": "Test Street",
+                    "housenumber": "123",
+                    "door": "4",
+                    "squaremeter": 56.9,
+                    "postalcode": "1010",
+                },
+                "links": {"export": f"{self.url}/api/flats/{flat_id}/export"},
+            }
+        )
+
+    async def _export(self, request: web.Request) -> web.Response:
+        flat_id = request.match_info["flat_id"]
+        return web.Response(
+            status=302, headers={"Location": f"{self.url}/download/{flat_id}.csv"}
+        )
+
+    async def _download(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.csv, content_type="text/csv")
+
+
+@pytest.fixture
+async def ista_server(
+    monkeypatch: pytest.MonkeyPatch, socket_enabled: None
+) -> AsyncGenerator[FakeIstaServer]:
+    """Serve the fake portal on localhost and point the API client at it."""
+    fake = FakeIstaServer()
+    server = TestServer(fake.app())
+    await server.start_server()
+    fake.url = str(server.make_url("")).rstrip("/")
+    monkeypatch.setattr(ista_api, "BASE_URL", fake.url)
+    monkeypatch.setattr(ista_api, "LOGIN_URL", f"{fake.url}/auth")
+    monkeypatch.setattr(ista_api, "TOKEN_URL", f"{fake.url}/token")
+    monkeypatch.setattr(store, "TOKEN_URL", f"{fake.url}/token")
+    yield fake
+    await server.close()
@@ -0,0 +1,109 @@
+"""Test the ista VDM client pool."""
+
+import asyncio
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ista_vdm import coordinator as coordinator_module
+from custom_components.ista_vdm.client import DATA_CLIENTS, async_get_flat_ids
+from custom_components.ista_vdm.const import DOMAIN
+
+from .conftest import FakeIstaServer
+
+
+def _add_entry(hass: HomeAssistant, email: str, password: str) -> MockConfigEntry:
+    """Add a config entry for an account of the fake portal."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": email, "password": password},
+        unique_id=email,
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def test_entries_of_one_account_share_client(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test entries of the same account log in once and share the client."""
+    first = _add_entry(hass, "test@example.com", "password")
+    second = _add_entry(hass, "Test@Example.com", "password")
+
+    await asyncio.gather(
+        hass.config_entries.async_setup(first.entry_id),
+        hass.config_entries.async_setup(second.entry_id),
+    )
+    await hass.async_block_till_done()
+
+    assert first.state == ConfigEntryState.LOADED
+    assert second.state == ConfigEntryState.LOADED
+    assert first.runtime_data.api is second.runtime_data.api
+    assert ista_server.calls["login"] == 1
+    assert ista_server.calls["token"] == 1
+
+    # The client stays pooled until the last entry of the account unloads
+    await hass.config_entries.async_unload(first.entry_id)
+    client = hass.data[DATA_CLIENTS]["test@example.com"]
+    assert client.users == 1
+    assert not client.session.closed
+
+    await hass.config_entries.async_unload(second.entry_id)
+    assert hass.data[DATA_CLIENTS] == {}
+    # Detached from Home Assistant's shared connector
+    assert client.session.closed
+
+
+async def test_changed_password_gets_own_client(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test an entry with other credentials does not reuse the pooled client."""
+    first = _add_entry(hass, "test@example.com", "password")
+    await hass.config_entries.async_setup(first.entry_id)
+    await hass.async_block_till_done()
+
+    # Added afterwards, setting up the integration sets up all its entries
+    second = _add_entry(hass, "Test@Example.com", "other")
+    ista_server.password = "other"
+    await hass.config_entries.async_setup(second.entry_id)
+    await hass.async_block_till_done()
+
+    assert first.runtime_data.api is not second.runtime_data.api
+    assert second.state == ConfigEntryState.LOADED
+    assert hass.data[DATA_CLIENTS]["test@example.com"].api.password == "other"
+
+
+async def test_tokens_expire_during_flat_fan_out(
+    hass: HomeAssistant, ista_server: FakeIstaServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test flats fetched after the tokens expired get their own data."""
+    ista_server.flats = [1, 2]
+    entry = _add_entry(hass, "test@example.com", "password")
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    api = entry.runtime_data.api
+    coordinator = entry.runtime_data.coordinator
+
+    async def _async_list_then_expire(api) -> list[str]:
+        flat_ids = await async_get_flat_ids(api)
+        # Expired while the flats waited for their turn, and cannot be
+        # refreshed, so the next request has to log in again
+        api._token_expires = 1.0
+        api._refresh_token = None
+        return flat_ids
+
+    monkeypatch.setattr(
+        coordinator_module, "async_get_flat_ids", _async_list_then_expire
+    )
+    ista_server.paths.clear()
+    logins = ista_server.calls["login"]
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert ista_server.paths["/download/1.csv"] == 1
+    assert ista_server.paths["/download/2.csv"] == 1
+    # One login for both flats, its tokens kept by the shared client
+    assert ista_server.calls["login"] == logins + 1
+    assert api._access_token == f"access-{ista_server.calls['token']}"
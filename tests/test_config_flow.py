@@ -3,26 +3,45 @@
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from homeassistant.config_entries import SOURCE_REAUTH, SOURCE_USER
+from homeassistant.config_entries import SOURCE_REAUTH, SOURCE_USER, ConfigEntryState
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.ista_vdm.config_flow import CannotConnect, InvalidAuth
-from custom_components.ista_vdm.const import DOMAIN
+from custom_components.ista_vdm.config_flow import (
+    CannotConnect,
+    InvalidAuth,
+    validate_input,
+)
+from custom_components.ista_vdm.const import (
+    CONF_CHECK_DATA,
+    CONF_COMPACT_HISTORY,
+    CONF_FAST_START,
+    CONF_HISTORY_MONTHS,
+    CONF_MAX_PARALLEL_FLATS,
+    CONF_SERVE_STALE,
+    CONF_STALE_BUDGET_DAYS,
+    DEFAULT_FAST_START,
+    DEFAULT_MAX_PARALLEL_FLATS,
+    DEFAULT_SERVE_STALE,
+    DEFAULT_STALE_BUDGET_DAYS,
+    DOMAIN,
+)
+from custom_components.ista_vdm.handoff import async_pop_handoff
+
+from .conftest import FakeIstaServer, mock_api_client
 
 
 @pytest.fixture
 def mock_api():
     """Mock the IstaVdmAPI class."""
     with patch(
-        "custom_components.ista_vdm.config_flow.IstaVdmAPI",
+        "ista_vdm_api.IstaVdmAPI",
         autospec=True,
     ) as mock_api_class:
-        api_instance = AsyncMock()
+        api_instance = mock_api_client("12345")
         api_instance.authenticate = AsyncMock(return_value=True)
-        api_instance.flat_id = "12345"
         api_instance.user_id = "67890"
         mock_api_class.return_value = api_instance
         yield mock_api_class
@@ -65,7 +84,7 @@ async def test_user_form_success(hass: HomeAssistant, mock_api) -> None:
 async def test_invalid_auth(hass: HomeAssistant) -> None:
     """Test we handle invalid auth."""
     with patch(
-        "custom_components.ista_vdm.config_flow.IstaVdmAPI.authenticate",
+        "ista_vdm_api.IstaVdmAPI.authenticate",
         side_effect=InvalidAuth,
     ):
         result = await hass.config_entries.flow.async_init(
@@ -88,7 +107,7 @@ async def test_invalid_auth(hass: HomeAssistant) -> None:
 async def test_cannot_connect(hass: HomeAssistant) -> None:
     """Test we handle cannot connect error."""
     with patch(
-        "custom_components.ista_vdm.config_flow.IstaVdmAPI.authenticate",
+        "ista_vdm_api.IstaVdmAPI.authenticate",
         side_effect=CannotConnect,
     ):
         result = await hass.config_entries.flow.async_init(
@@ -177,3 +196,117 @@ async def test_duplicate_entry(hass: HomeAssistant, mock_api) -> None:
 
     assert result["type"] == FlowResultType.ABORT
     assert result["reason"] == "already_configured"
+
+
+async def test_setup_reuses_flow_client(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test the new entry reuses the client the flow logged in with."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {CONF_EMAIL: "test@example.com", CONF_PASSWORD: "password"},
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    entry = result["result"]
+    assert entry.state == ConfigEntryState.LOADED
+    snapshot = entry.runtime_data.coordinator.data["1"]
+    assert snapshot.latest.heating_consumption == 392.1
+
+    # One login in the flow, one deferred data download in setup
+    assert ista_server.calls["login"] == 1
+    assert ista_server.calls["download"] == 1
+
+
+async def test_setup_served_from_checked_flow_data(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test setup reuses the data downloaded by the flow's data check."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            CONF_EMAIL: "test@example.com",
+            CONF_PASSWORD: "password",
+            CONF_CHECK_DATA: True,
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    entry = result["result"]
+    # The check is not stored with the credentials
+    assert CONF_CHECK_DATA not in entry.data
+    assert entry.state == ConfigEntryState.LOADED
+    snapshot = entry.runtime_data.coordinator.data["1"]
+    assert snapshot.latest.heating_consumption == 392.1
+    # Downloaded once by the flow, setup only listed the flats of the account
+    assert ista_server.calls["login"] == 1
+    assert ista_server.calls["download"] == 1
+
+
+async def test_validation_requests(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test credential-only validation skips the data download."""
+    data = {CONF_EMAIL: "test@example.com", CONF_PASSWORD: "password"}
+
+    await validate_input(hass, data, check_data=False)
+    async_pop_handoff(hass, "test@example.com", "password").session.detach()
+
+    # Login page, credentials, token exchange and flat lookup only
+    assert ista_server.calls == {"login_page": 1, "login": 1, "token": 1, "flats": 1}
+
+    ista_server.calls.clear()
+    await validate_input(hass, data, check_data=True)
+    async_pop_handoff(hass, "test@example.com", "password").session.detach()
+
+    # The data check also fetches the flat and downloads its export
+    assert ista_server.calls["export"] == 1
+    assert ista_server.calls["download"] == 1
+
+
+async def test_options_flow_reloads_with_history_format(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test the history options are stored and applied by a reload."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_EMAIL: "test@example.com", CONF_PASSWORD: "password"},
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {CONF_HISTORY_MONTHS: 1, CONF_COMPACT_HISTORY: True},
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_HISTORY_MONTHS: 1,
+        CONF_COMPACT_HISTORY: True,
+        CONF_MAX_PARALLEL_FLATS: DEFAULT_MAX_PARALLEL_FLATS,
+        CONF_SERVE_STALE: DEFAULT_SERVE_STALE,
+        CONF_STALE_BUDGET_DAYS: DEFAULT_STALE_BUDGET_DAYS,
+        CONF_FAST_START: DEFAULT_FAST_START,
+    }
+    assert entry.state == ConfigEntryState.LOADED
+    attributes = entry.runtime_data.coordinator.data["1"].heating_attributes
+    # All known months are counted, the attribute only carries the latest
+    assert attributes["total_months"] == 2
+    assert attributes["history_months"] == 1
+    assert attributes["history"]["consumption_kwh"] == (392.1,)
@@ -0,0 +1,78 @@
+"""Test the import time of the ista VDM integration."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE = "custom_components.ista_vdm"
+
+# Loaded by flows and setups only, in the import executor
+LAZY_MODULES = ("ista_vdm_api", "bs4")
+# Loaded by the statistics import only, once the recorder is running
+LAZY_COMPONENTS = ("homeassistant.components.recorder",)
+
+
+def _import_times(module: str) -> dict[str, tuple[int, int]]:
+    """Import a module in a fresh interpreter with ``-X importtime``.
+
+    Returns the self and cumulative import time of every module imported
+    along with it, in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        text=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        if own.strip().isdigit():
+            times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+@pytest.mark.parametrize(
+    "module",
+    [PACKAGE, f"{PACKAGE}.config_flow", f"{PACKAGE}.sensor", f"{PACKAGE}.diagnostics"],
+)
+def test_client_library_imported_lazily(module: str) -> None:
+    """Test loading the integration does not load the client library."""
+    times = _import_times(module)
+
+    assert module in times
+    assert not [name for name in times if name.split(".")[0] in LAZY_MODULES]
+
+
+def test_heavy_modules_not_loaded() -> None:
+    """Test importing every module of the integration leaves them unloaded."""
+    package = Path(__file__).parent.parent.joinpath(*PACKAGE.split("."))
+    modules = sorted(
+        f"{PACKAGE}.{path.stem}"
+        for path in package.glob("*.py")
+        if path.stem != "__init__"
+    )
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {', '.join(modules)}; print(*sys.modules, sep='\\n')",
+        ],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        text=True,
+    )
+    loaded = result.stdout.split()
+
+    assert f"{PACKAGE}.statistics" in loaded
+    assert not [
+        name
+        for name in loaded
+        if name.split(".")[0] in LAZY_MODULES or name.startswith(LAZY_COMPONENTS)
+    ]
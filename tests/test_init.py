@@ -1,15 +1,43 @@
 """Test the ista VDM integration initialization."""
 
+import time
+from datetime import timedelta
+from typing import Any
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from homeassistant.config_entries import ConfigEntryState
-from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.config_entries import SOURCE_USER, ConfigEntryState
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_FINAL_WRITE,
+    EVENT_HOMEASSISTANT_STARTED,
+)
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
 
-from custom_components.ista_vdm.const import DOMAIN
+from custom_components.ista_vdm import resilience
+from custom_components.ista_vdm.const import (
+    CONF_FAST_START,
+    CONF_FLAT_ID,
+    CONF_MAX_PARALLEL_FLATS,
+    DOMAIN,
+    RETRY_ATTEMPTS,
+    TOKEN_SAVE_DELAY,
+)
+from custom_components.ista_vdm.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.ista_vdm.store import IstaVdmDataCache
 from ista_vdm_api import IstaVdmAuthError
 
+from .conftest import FakeIstaServer, mock_api_client
+
 
 async def test_setup_entry(hass: HomeAssistant) -> None:
     """Test setting up the integration."""
@@ -24,10 +52,13 @@ async def test_setup_entry(hass: HomeAssistant) -> None:
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.IstaVdmAPI",
+        "ista_vdm_api.IstaVdmAPI",
         autospec=True,
-    ) as mock_api:
-        api_instance = AsyncMock()
+    ) as mock_api, patch(
+        "custom_components.ista_vdm.coordinator.async_get_flat_ids",
+        return_value=["1"],
+    ):
+        api_instance = mock_api_client()
         api_instance.authenticate = AsyncMock(return_value=True)
         api_instance.get_consumption_data = AsyncMock(return_value=[])
         api_instance.get_flat_info = AsyncMock(return_value={})
@@ -52,7 +83,7 @@ async def test_setup_entry_auth_failure(hass: HomeAssistant) -> None:
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.IstaVdmAPI.authenticate",
+        "ista_vdm_api.IstaVdmAPI.authenticate",
         side_effect=IstaVdmAuthError("Invalid credentials"),
     ) as mock_auth:
         result = await hass.config_entries.async_setup(entry.entry_id)
@@ -75,7 +106,7 @@ async def test_setup_entry_auth_failure_triggers_reauth(hass: HomeAssistant) ->
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.IstaVdmAPI.authenticate",
+        "ista_vdm_api.IstaVdmAPI.authenticate",
         side_effect=IstaVdmAuthError("Invalid credentials"),
     ):
         with patch.object(
@@ -88,8 +119,11 @@ async def test_setup_entry_auth_failure_triggers_reauth(hass: HomeAssistant) ->
             mock_reauth.assert_called_once_with(hass)
 
 
-async def test_setup_entry_unexpected_error_triggers_reauth(hass: HomeAssistant) -> None:
-    """Test that unexpected errors also trigger re-authentication flow."""
+async def test_setup_entry_unexpected_error_retries_setup(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that unexpected errors retry the setup instead of a reauth."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
     entry = MockConfigEntry(
         domain=DOMAIN,
         data={
@@ -101,7 +135,7 @@ async def test_setup_entry_unexpected_error_triggers_reauth(hass: HomeAssistant)
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.IstaVdmAPI.authenticate",
+        "ista_vdm_api.IstaVdmAPI.authenticate",
         side_effect=Exception("Unexpected network error"),
     ):
         with patch.object(
@@ -111,7 +145,26 @@ async def test_setup_entry_unexpected_error_triggers_reauth(hass: HomeAssistant)
             await hass.async_block_till_done()
             
             assert result is False
-            mock_reauth.assert_called_once_with(hass)
+            assert entry.state == ConfigEntryState.SETUP_RETRY
+            mock_reauth.assert_not_called()
+
+
+async def test_setup_entry_portal_unreachable_retries_setup(
+    hass: HomeAssistant, ista_server: FakeIstaServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a login failing to reach the portal is retried, not reauthed."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    entry = _add_entry(hass)
+    ista_server.failures["login_page"] = 100
+
+    with patch.object(entry, "async_start_reauth") as mock_reauth:
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.SETUP_RETRY
+    mock_reauth.assert_not_called()
+    # Retried like a refresh, and counted by the circuit breaker
+    assert ista_server.calls["login_page"] == RETRY_ATTEMPTS
 
 
 async def test_unload_entry(hass: HomeAssistant) -> None:
@@ -127,10 +180,13 @@ async def test_unload_entry(hass: HomeAssistant) -> None:
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.IstaVdmAPI",
+        "ista_vdm_api.IstaVdmAPI",
         autospec=True,
-    ) as mock_api:
-        api_instance = AsyncMock()
+    ) as mock_api, patch(
+        "custom_components.ista_vdm.coordinator.async_get_flat_ids",
+        return_value=["1"],
+    ):
+        api_instance = mock_api_client()
         api_instance.authenticate = AsyncMock(return_value=True)
         api_instance.get_consumption_data = AsyncMock(return_value=[])
         api_instance.get_flat_info = AsyncMock(return_value={})
@@ -161,10 +217,13 @@ async def test_reload_entry(hass: HomeAssistant) -> None:
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.IstaVdmAPI",
+        "ista_vdm_api.IstaVdmAPI",
         autospec=True,
-    ) as mock_api:
-        api_instance = AsyncMock()
+    ) as mock_api, patch(
+        "custom_components.ista_vdm.coordinator.async_get_flat_ids",
+        return_value=["1"],
+    ):
+        api_instance = mock_api_client()
         api_instance.authenticate = AsyncMock(return_value=True)
         api_instance.get_consumption_data = AsyncMock(return_value=[])
         api_instance.get_flat_info = AsyncMock(return_value={})
@@ -180,3 +239,526 @@ async def test_reload_entry(hass: HomeAssistant) -> None:
         await hass.async_block_till_done()
         
         assert entry.state == ConfigEntryState.LOADED
+
+
+async def test_websession_reused_across_flow_setup_and_reload(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test config flow, setup and reload reuse pooled keep-alive connections."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {CONF_EMAIL: "test@example.com", CONF_PASSWORD: "password"},
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    entry = result["result"]
+    assert entry.state == ConfigEntryState.LOADED
+
+    await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state == ConfigEntryState.LOADED
+
+    # Setup and reload each downloaded the export, the flow only logged in ...
+    assert ista_server.calls["download"] == 2
+    # ... over Home Assistant's pool: one keep-alive connection for each of
+    # the two concurrent fetches of flat info and consumption, not one per
+    # request
+    assert len(ista_server.connections) <= 2
+
+
+def _add_entry(hass: HomeAssistant, **data: Any) -> MockConfigEntry:
+    """Add a config entry for the fake portal account."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": "test@example.com", "password": "password", **data},
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+def _stored_tokens(entry: MockConfigEntry, expires: float) -> dict[str, Any]:
+    """Return persisted token storage for the entry."""
+    return {
+        "version": 1,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.tokens.{entry.entry_id}",
+        "data": {
+            "email": "test@example.com",
+            "_access_token": "stored-access",
+            "_refresh_token": "stored-refresh",
+            "_token_expires": expires,
+            "_flat_id": "1",
+            "_user_id": "2",
+        },
+    }
+
+
+async def test_setup_persists_tokens(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Test tokens from the first login are written to storage."""
+    entry = _add_entry(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=TOKEN_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    assert ista_server.calls["login"] == 1
+    stored = hass_storage[f"{DOMAIN}.tokens.{entry.entry_id}"]["data"]
+    assert stored["_access_token"] == "access-1"
+    assert stored["_refresh_token"] == "refresh-1"
+    assert stored["_flat_id"] == "1"
+
+
+async def test_setup_reuses_persisted_tokens(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Test a valid persisted access token skips the password login."""
+    entry = _add_entry(hass)
+    hass_storage[f"{DOMAIN}.tokens.{entry.entry_id}"] = _stored_tokens(
+        entry, time.time() + 3600
+    )
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    assert ista_server.calls["login_page"] == 0
+    assert ista_server.calls["login"] == 0
+    assert ista_server.calls["token"] == 0
+    assert ista_server.calls["download"] == 1
+
+
+async def test_setup_refreshes_expired_tokens(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Test an expired persisted token is renewed with the refresh token."""
+    entry = _add_entry(hass)
+    hass_storage[f"{DOMAIN}.tokens.{entry.entry_id}"] = _stored_tokens(
+        entry, time.time() - 10
+    )
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=TOKEN_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    assert ista_server.calls["login"] == 0
+    assert ista_server.calls["token"] == 1
+    stored = hass_storage[f"{DOMAIN}.tokens.{entry.entry_id}"]["data"]
+    assert stored["_access_token"] == "access-1"
+
+
+async def test_cold_start_logs_in_once(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test setup and the first refresh share a single login round-trip."""
+    entry = _add_entry(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    assert ista_server.calls["login_page"] == 1
+    assert ista_server.calls["login"] == 1
+    assert ista_server.calls["token"] == 1
+    assert ista_server.calls["download"] == 1
+    assert entry.runtime_data.coordinator.api is entry.runtime_data.api
+
+
+async def test_cold_start_latency(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test flat information and consumption are fetched concurrently."""
+    # Long enough for requests sent together to be in flight together
+    ista_server.delay = 0.1
+    entry = _add_entry(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    # The flats are listed by the login and once for both coordinators
+    assert ista_server.calls["flats"] == 2
+    # The flat information was requested alongside the consumption
+    # download, not after it
+    assert ista_server.max_in_flight == 2
+
+def _cached_data(entry: MockConfigEntry) -> dict[str, Any]:
+    """Return a persisted data cache for the entry."""
+    return {
+        "version": 1,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.cache.{entry.entry_id}",
+        "data": {
+            "flats": {
+                "1": {
+                    "records": [
+                        {
+                            "period_start": "2025-11-01",
+                            "period_end": "2025-11-30",
+                            "heating_consumption": 327.8,
+                            "heating_cost": None,
+                            "hot_water_consumption": 0.29,
+                            "hot_water_cost": None,
+                        }
+                    ],
+                    "flat_info": {"city": "Vienna", "street": "Test Street"},
+                }
+            },
+            "publication_days": [4, 5],
+        },
+    }
+
+
+async def test_setup_served_from_cache(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Test setup comes up from the cache and revalidates in the background."""
+    # A cache is only written once the primary flat has been pinned
+    entry = _add_entry(hass, flat_id="1")
+    hass_storage[f"{DOMAIN}.cache.{entry.entry_id}"] = _cached_data(entry)
+    ista_server.delay = 0.5
+
+    start = time.perf_counter()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+
+    # Entities are up from the cache before the portal answered
+    assert elapsed < ista_server.delay
+    assert ista_server.calls["download"] == 0
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    assert hass.states.get(entity_id).state == "327.8"
+    coordinator = entry.runtime_data.coordinator
+    assert list(coordinator.polling.observed_days) == [4, 5]
+
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert ista_server.calls["download"] == 1
+    assert hass.states.get(entity_id).state == "392.1"
+
+
+async def test_revalidation_portal_unreachable_no_reauth(
+    hass: HomeAssistant,
+    ista_server: FakeIstaServer,
+    hass_storage: dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test an outage during the background login keeps the cached data."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    entry = _add_entry(hass, flat_id="1")
+    hass_storage[f"{DOMAIN}.cache.{entry.entry_id}"] = _cached_data(entry)
+    ista_server.failures["login_page"] = 100
+
+    with patch.object(entry, "async_start_reauth") as mock_reauth:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    mock_reauth.assert_not_called()
+    coordinator = entry.runtime_data.coordinator
+    # Left to the refresh, which failed and backs off
+    assert not coordinator.last_update_success
+    assert coordinator.backoff.failures == 1
+    assert ista_server.calls["download"] == 0
+
+
+async def test_fast_start_setup_time(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Measure setup without cached data, with and without fast start."""
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    entity_registry = er.async_get(hass)
+    entity_id = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    city = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_flat_city"
+    )
+    ista_server.delay = 0.2
+    hass.set_state(CoreState.starting)
+
+    elapsed = {}
+    for fast_start in (False, True):
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        hass_storage.pop(f"{DOMAIN}.cache.{entry.entry_id}", None)
+        hass.config_entries.async_update_entry(
+            entry, options={CONF_FAST_START: fast_start}
+        )
+        calls = ista_server.calls.copy()
+
+        start = time.perf_counter()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        elapsed[fast_start] = time.perf_counter() - start
+        await hass.async_block_till_done()
+
+        assert hass.states.get(entity_id).state == "392.1"
+        if not fast_start:
+            # Waited for at least the listing and the consumption download
+            assert ista_server.calls["download"] == calls["download"] + 1
+            assert elapsed[fast_start] >= 4 * ista_server.delay
+
+    # Registered with the last state, nothing fetched before startup
+    assert elapsed[True] < ista_server.delay
+    assert ista_server.calls == calls
+    assert "history" not in hass.states.get(entity_id).attributes
+
+    hass.set_state(CoreState.running)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert ista_server.calls["download"] == calls["download"] + 1
+    assert hass.states.get(entity_id).attributes["history"]
+    # The flat sensors are added once the deferred refresh is done
+    assert hass.states.get(city).state == "Vienna"
+
+
+async def test_fast_start_flat_sensors_without_consumption(
+    hass: HomeAssistant,
+    ista_server: FakeIstaServer,
+    hass_storage: dict[str, Any],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the flat sensors are added even if the deferred download fails."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    city = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_flat_city"
+    )
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    hass_storage.pop(f"{DOMAIN}.cache.{entry.entry_id}", None)
+    hass.config_entries.async_update_entry(entry, options={CONF_FAST_START: True})
+    hass.set_state(CoreState.starting)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    ista_server.failures["download"] = 100
+    hass.set_state(CoreState.running)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert not entry.runtime_data.coordinator.last_update_success
+    assert hass.states.get(city).state == "Vienna"
+
+
+async def test_refresh_persists_cache(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Test the last good dataset is written to the cache."""
+    entry = _add_entry(hass)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    # Both coordinators schedule the delayed save; the store then waits for
+    # the later deadline on the loop clock, which fake time does not move
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    cached = hass_storage[f"{DOMAIN}.cache.{entry.entry_id}"]["data"]["flats"]
+    assert [record["period_start"] for record in cached["1"]["records"]] == [
+        "2025-12-01",
+        "2025-11-01",
+    ]
+    assert cached["1"]["flat_info"]["city"] == "Vienna"
+
+
+async def test_cache_keeps_flat_info_without_records(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Test flat information is persisted for flats without records."""
+    cache = IstaVdmDataCache(hass, "entry")
+    cache.data.records = {"1": []}
+    cache.data.flat_info = {"1": {"city": "Vienna"}, "2": {"city": "Graz"}}
+    cache.async_save()
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    flats = hass_storage[f"{DOMAIN}.cache.entry"]["data"]["flats"]
+    assert "records" not in flats["2"]
+    restored = IstaVdmDataCache(hass, "entry")
+    assert await restored.async_load()
+    assert restored.data.records == {"1": []}
+    assert restored.data.flat_info == cache.data.flat_info
+
+
+async def test_flat_sensors_not_written_on_consumption_refresh(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test flat and consumption sensors are only updated by their own track."""
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    city = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_flat_city"
+    )
+    heating = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    city_reported = hass.states.get(city).last_reported
+    heating_reported = hass.states.get(heating).last_reported
+
+    ista_server.csv = ista_server.csv.replace("392,1", "400,0")
+    await entry.runtime_data.coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert ista_server.calls["download"] == 2
+    assert hass.states.get(heating).last_reported > heating_reported
+    assert hass.states.get(city).last_reported == city_reported
+
+    # Unchanged flat information does not notify its sensors either
+    await entry.runtime_data.flat_coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get(city).last_reported == city_reported
+
+
+async def test_flats_fetched_concurrently(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test the flats of a refresh are requested at the same time."""
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = entry.runtime_data.coordinator
+    # Long enough for requests sent together to be in flight together
+    ista_server.delay = 0.1
+    ista_server.flats = [1, 2, 3, 4]
+    ista_server.max_in_flight = 0
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert list(coordinator.data) == ["1", "2", "3", "4"]
+    assert ista_server.max_in_flight == 4
+
+    # New flats got their own devices and entities on the fly
+    entity_registry = er.async_get(hass)
+    assert entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    heating_4 = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_4_heating_consumption"
+    )
+    assert hass.states.get(heating_4).state == "392.1"
+    devices = dr.async_entries_for_config_entry(dr.async_get(hass), entry.entry_id)
+    assert len(devices) == 4
+
+
+async def test_parallel_flats_bounded(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test the option bounds how many flats are fetched at once."""
+    ista_server.flats = [1, 2, 3, 4]
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": "test@example.com", "password": "password"},
+        options={CONF_MAX_PARALLEL_FLATS: 1},
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    ista_server.delay = 0.1
+    ista_server.max_in_flight = 0
+
+    await entry.runtime_data.coordinator.async_refresh()
+
+    assert ista_server.calls["download"] == 8
+    assert ista_server.max_in_flight == 1
+
+
+async def test_vanished_flat_removed(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test the device and entities of a flat the portal no longer lists go."""
+    ista_server.flats = [1, 2]
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    assert entry.data[CONF_FLAT_ID] == "1"
+    assert entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_2_flat_city"
+    )
+
+    ista_server.flats = [1]
+    await entry.runtime_data.coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert list(entry.runtime_data.coordinator.data) == ["1"]
+    assert not device_registry.async_get_device({(DOMAIN, f"{entry.entry_id}_2")})
+    for key in ("heating_consumption", "flat_city"):
+        assert not entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{entry.entry_id}_2_{key}"
+        )
+    # The primary flat keeps its single-flat unique ids
+    assert device_registry.async_get_device({(DOMAIN, entry.entry_id)})
+    assert entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+
+
+async def test_empty_flat_list_fails_refresh(
+    hass: HomeAssistant, ista_server: FakeIstaServer, hass_storage: dict[str, Any]
+) -> None:
+    """Test an account listing no flats keeps the last data and devices."""
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = entry.runtime_data.coordinator
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+
+    ista_server.flats = []
+    await coordinator.async_refresh()
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    assert not coordinator.last_update_success
+    assert list(coordinator.data) == ["1"]
+    assert dr.async_get(hass).async_get_device({(DOMAIN, entry.entry_id)})
+    assert er.async_get(hass).async_get(entity_id)
+    cached = hass_storage[f"{DOMAIN}.cache.{entry.entry_id}"]["data"]["flats"]
+    assert cached["1"]["records"]
+
+
+async def test_diagnostics_redact_address(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test diagnostics do not expose the address of a flat."""
+    entry = _add_entry(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    flat_info = diagnostics["flat_info"]["1"]
+    assert flat_info["city"] == "Vienna"
+    assert flat_info["squaremeter"] == 56.9
+    for key in ("street", "housenumber", "door", "postalcode"):
+        assert flat_info[key] == "**REDACTED**"
+    assert diagnostics["entry_data"]["email"] == "**REDACTED**"
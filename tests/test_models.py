@@ -0,0 +1,110 @@
+"""Test the ista VDM data models."""
+
+from datetime import date
+
+from ista_vdm_api import ConsumptionData
+
+from custom_components.ista_vdm.models import IstaVdmConsumptionSnapshot
+
+
+def _record(year: int, month: int, heating: float) -> ConsumptionData:
+    """Build a record for the given month."""
+    return ConsumptionData(
+        period_start=date(year, month, 1),
+        period_end=date(year, month, 28),
+        heating_consumption=heating,
+        heating_cost=None,
+        hot_water_consumption=None,
+        hot_water_cost=None,
+    )
+
+
+def test_snapshot_sorted_and_indexed() -> None:
+    """Test the snapshot sorts newest first and indexes by period."""
+    snapshot = IstaVdmConsumptionSnapshot.from_records(
+        [_record(2025, 10, 1.0), _record(2025, 12, 3.0), _record(2025, 11, 2.0)]
+    )
+
+    assert len(snapshot) == 3
+    assert [c.period_start.month for c in snapshot.records] == [12, 11, 10]
+    assert snapshot.latest.heating_consumption == 3.0
+    assert snapshot.by_period[date(2025, 11, 1)].heating_consumption == 2.0
+
+
+def test_empty_snapshot() -> None:
+    """Test an empty snapshot is falsy and has no latest record."""
+    snapshot = IstaVdmConsumptionSnapshot.from_records([])
+
+    assert not snapshot
+    assert snapshot.latest is None
+    assert snapshot.by_period == {}
+
+
+def test_merge_keeps_known_periods() -> None:
+    """Test merging keeps old periods and reuses their rendered rows."""
+    snapshot = IstaVdmConsumptionSnapshot.from_records(
+        [_record(2025, month, float(month)) for month in range(1, 11)]
+    )
+
+    # The portal only returns the last two months plus a new one
+    merged = snapshot.merge(
+        [_record(2025, 9, 9.0), _record(2025, 10, 10.5), _record(2025, 11, 11.0)]
+    )
+
+    assert len(merged) == 11
+    assert merged.latest.heating_consumption == 11.0
+    assert merged.by_period[date(2025, 10, 1)].heating_consumption == 10.5
+    assert merged.by_period[date(2025, 1, 1)].heating_consumption == 1.0
+    assert merged.heating_attributes["total_months"] == 11
+    # Unchanged periods are not rendered again
+    assert merged.heating_rows[2] is snapshot.heating_rows[1]
+    assert merged.heating_rows[-1] is snapshot.heating_rows[-1]
+
+
+def test_merge_ignores_changes_to_old_periods() -> None:
+    """Test only the most recent known periods take corrections."""
+    snapshot = IstaVdmConsumptionSnapshot.from_records(
+        [_record(2025, month, float(month)) for month in range(1, 4)]
+    )
+
+    merged = snapshot.merge([_record(2025, 1, 99.0)], overlap=2)
+
+    assert merged is snapshot
+    assert merged.by_period[date(2025, 1, 1)].heating_consumption == 1.0
+
+
+def test_merge_unchanged_returns_same_snapshot() -> None:
+    """Test merging the same records returns the existing snapshot."""
+    records = [_record(2025, month, float(month)) for month in range(1, 4)]
+    snapshot = IstaVdmConsumptionSnapshot.from_records(records)
+
+    assert snapshot.merge(records) is snapshot
+
+
+def test_merge_into_empty_snapshot() -> None:
+    """Test merging into an empty snapshot builds a new one."""
+    snapshot = IstaVdmConsumptionSnapshot.from_records([])
+
+    merged = snapshot.merge([_record(2025, 1, 1.0)])
+
+    assert len(merged) == 1
+
+
+def test_snapshot_equality_by_content() -> None:
+    """Test snapshots with the same history compare equal."""
+    records = [_record(2025, month, float(month)) for month in range(1, 4)]
+    snapshot = IstaVdmConsumptionSnapshot.from_records(records)
+    same = IstaVdmConsumptionSnapshot.from_records(reversed(records))
+    corrected = IstaVdmConsumptionSnapshot.from_records(
+        [*records[:2], _record(2025, 3, 3.5)]
+    )
+
+    assert snapshot == same
+    assert hash(snapshot) == hash(same)
+    assert snapshot != corrected
+    assert same.changed_keys(snapshot) == frozenset()
+    assert corrected.changed_keys(snapshot) == {"heating_consumption"}
+    assert snapshot.changed_keys(None) == {
+        "heating_consumption",
+        "hot_water_consumption",
+    }
@@ -0,0 +1,106 @@
+"""Test the ista VDM polling schedule."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.ista_vdm.const import (
+    UPDATE_INTERVAL,
+    UPDATE_INTERVAL_FAST,
+    UPDATE_INTERVAL_IDLE,
+)
+from custom_components.ista_vdm.polling import IstaVdmPollingSchedule
+
+
+def _local(*args: int) -> datetime:
+    """Return a local datetime."""
+    return datetime(*args, tzinfo=dt_util.get_default_time_zone())
+
+
+def _latest_published(now: datetime, publication_day: int) -> date:
+    """Return the last published period end if ista publishes on the given day."""
+    period_end = now.date().replace(day=1) - timedelta(days=1)
+    if now.day < publication_day:
+        period_end = period_end.replace(day=1) - timedelta(days=1)
+    return period_end
+
+
+async def test_no_data_polls_daily(hass: HomeAssistant) -> None:
+    """Test the default interval is used before any data was seen."""
+    schedule = IstaVdmPollingSchedule()
+
+    assert schedule.next_interval(_local(2025, 12, 10, 12)) == timedelta(
+        seconds=UPDATE_INTERVAL
+    )
+
+
+@pytest.mark.parametrize(
+    ("now", "latest", "expected"),
+    [
+        # Last month is in, next window is weeks away
+        ((2025, 12, 10, 12), date(2025, 11, 30), UPDATE_INTERVAL_IDLE),
+        # Last month is in, wake up at the start of January's window
+        ((2025, 12, 30, 12), date(2025, 11, 30), 4.5 * 86400),
+        # November is missing, wait for the window on December 4th
+        ((2025, 12, 2, 12), date(2025, 10, 31), 1.5 * 86400),
+        # Inside the window
+        ((2025, 12, 5, 12), date(2025, 10, 31), UPDATE_INTERVAL_FAST),
+        # Publication is late
+        ((2025, 12, 20, 12), date(2025, 10, 31), UPDATE_INTERVAL),
+    ],
+)
+async def test_next_interval(
+    hass: HomeAssistant, now: tuple[int, ...], latest: date, expected: float
+) -> None:
+    """Test the interval follows the publication window."""
+    schedule = IstaVdmPollingSchedule()
+    schedule.observe(_local(*now), latest)
+
+    assert schedule.next_interval(_local(*now)) == timedelta(seconds=expected)
+
+
+async def test_learns_publication_day(hass: HomeAssistant) -> None:
+    """Test the day a new period first appears moves the window."""
+    schedule = IstaVdmPollingSchedule()
+    schedule.observe(_local(2025, 12, 1), date(2025, 11, 30))
+    assert list(schedule.observed_days) == []
+
+    schedule.observe(_local(2026, 1, 9, 8), date(2025, 12, 31))
+    assert schedule.publication_day == 9
+
+    # Waiting for January, the window now opens on February 8th
+    assert schedule.next_interval(_local(2026, 2, 6)) == timedelta(days=2)
+
+
+async def test_restored_state(hass: HomeAssistant) -> None:
+    """Test a restart continues from the latest period seen before it."""
+    schedule = IstaVdmPollingSchedule()
+    schedule.restore([5, 5], date(2025, 11, 30))
+
+    # Waiting for December, before the first refresh after the restart
+    assert schedule.next_interval(_local(2026, 1, 2)) == timedelta(days=2)
+
+    # The period known before the restart is not a new publication ...
+    schedule.observe(_local(2026, 1, 2), date(2025, 11, 30))
+    assert list(schedule.observed_days) == [5, 5]
+    # ... but the first new one is
+    schedule.observe(_local(2026, 1, 6, 8), date(2025, 12, 31))
+    assert list(schedule.observed_days) == [5, 5, 6]
+
+
+async def test_request_volume_over_a_year(hass: HomeAssistant) -> None:
+    """Count refreshes over a year of monthly publications on the 5th."""
+    schedule = IstaVdmPollingSchedule()
+    now = _local(2025, 1, 1)
+    end = now + timedelta(days=365)
+    polls = 0
+    while now < end:
+        polls += 1
+        schedule.observe(now, _latest_published(now, 5))
+        now += schedule.next_interval(now)
+
+    # A fixed daily poll makes 365 requests
+    assert polls < 0.3 * 365
+    assert schedule.publication_day == 5
@@ -0,0 +1,294 @@
+"""Test the ista VDM retries and circuit breaker."""
+
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from aiohttp import ClientConnectionError
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from ista_vdm_api import IstaVdmAuthError, IstaVdmError
+from ista_vdm_api import api as ista_api
+
+from custom_components.ista_vdm import resilience
+from custom_components.ista_vdm.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_DURATION,
+    CONF_SERVE_STALE,
+    CONF_STALE_BUDGET_DAYS,
+    DOMAIN,
+    FAILED_REFRESH_DELAY,
+    RETRY_ATTEMPTS,
+)
+from custom_components.ista_vdm.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.ista_vdm.resilience import (
+    CircuitState,
+    IstaVdmCircuitBreaker,
+    is_transient,
+)
+
+from .conftest import FakeIstaServer
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Retry right away, the loop clock does not move under a frozen time."""
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+
+
+@pytest.mark.parametrize(
+    ("message", "transient"),
+    [
+        ("Error getting consumption data: Failed to download CSV: 502", True),
+        ("Failed to get export: 429", True),
+        ("Network error: ServerDisconnectedError()", True),
+        ("Network error: TimeoutError()", True),
+        ("Failed to get flat details: 404", False),
+        ("Export URL not found in flat details", False),
+        ("Failed to parse CSV: invalid literal", False),
+    ],
+)
+async def test_error_classification(
+    hass: HomeAssistant, message: str, transient: bool
+) -> None:
+    """Test only timeouts, rate limiting and server errors are retried."""
+    assert is_transient(IstaVdmError(message)) is transient
+
+
+async def test_wrapped_login_error_classification(hass: HomeAssistant) -> None:
+    """Test login errors caused by the network are transient."""
+
+    def _wrapped(cause: Exception) -> IstaVdmAuthError:
+        # How the library wraps failures of its login
+        try:
+            raise cause
+        except Exception as err:
+            try:
+                raise IstaVdmAuthError(f"Authentication error: {err}")
+            except IstaVdmAuthError as wrapped:
+                return wrapped
+
+    assert is_transient(_wrapped(TimeoutError()))
+    assert is_transient(_wrapped(ClientConnectionError("Connection reset")))
+    assert is_transient(IstaVdmAuthError("Failed to load login page: 503"))
+    assert not is_transient(
+        _wrapped(IstaVdmAuthError("Login failed: Invalid username or password."))
+    )
+
+
+async def test_circuit_breaker_states(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Test the circuit opens, probes with a single request and closes."""
+    breaker = IstaVdmCircuitBreaker()
+    error = IstaVdmError("Failed to download CSV: 503")
+
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure(error)
+    assert breaker.state is CircuitState.CLOSED
+    breaker.record_failure(error)
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow()
+
+    freezer.tick(timedelta(seconds=CIRCUIT_OPEN_DURATION))
+    assert breaker.allow()
+    assert breaker.state is CircuitState.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    # A failed probe reopens the circuit for another full period
+    breaker.record_failure(error)
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow()
+
+    freezer.tick(timedelta(seconds=CIRCUIT_OPEN_DURATION))
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.as_dict() == {
+        "state": CircuitState.CLOSED,
+        "failures": 0,
+        "last_failure": str(error),
+        "opened_at": None,
+        "retry_at": None,
+    }
+
+
+async def _setup_entry(hass: HomeAssistant, **options: Any) -> MockConfigEntry:
+    """Set up an entry for the fake portal account."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": "test@example.com", "password": "password"},
+        options=options,
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_transient_error_retried_within_refresh(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test a transient 502 does not cost a refresh."""
+    entry = await _setup_entry(hass)
+    coordinator = entry.runtime_data.coordinator
+
+    ista_server.failures["download"] = 2
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert ista_server.calls["download"] == 1 + 3
+    assert coordinator.breaker.state is CircuitState.CLOSED
+    assert coordinator.backoff.failures == 0
+
+
+async def test_relogin_network_error_retried(
+    hass: HomeAssistant, ista_server: FakeIstaServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test an unreachable login realm during a re-login counts as an outage."""
+    entry = await _setup_entry(hass)
+    coordinator = entry.runtime_data.coordinator
+    calls = ista_server.calls.copy()
+
+    # The portal revoked the tokens and the login realm refuses connections
+    coordinator.api._access_token = None
+    monkeypatch.setattr(ista_api, "LOGIN_URL", "http://127.0.0.1:1/auth")
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert coordinator.breaker.failures == RETRY_ATTEMPTS
+    assert ista_server.calls == calls
+    assert not hass.config_entries.flow.async_progress()
+
+    # The next refresh logs in again once the realm is back
+    monkeypatch.setattr(ista_api, "LOGIN_URL", f"{ista_server.url}/auth")
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.breaker.failures == 0
+    assert ista_server.calls["login"] == calls["login"] + 1
+
+
+async def test_outage_opens_circuit(
+    hass: HomeAssistant,
+    ista_server: FakeIstaServer,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test an outage backs off and stops requests until the circuit reopens."""
+    entry = await _setup_entry(hass)
+    coordinator = entry.runtime_data.coordinator
+    ista_server.failures["download"] = 100
+
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert ista_server.calls["download"] == 1 + 3
+    # Retried in minutes instead of the next day
+    assert (
+        timedelta(seconds=FAILED_REFRESH_DELAY / 2)
+        <= coordinator.update_interval
+        <= timedelta(seconds=FAILED_REFRESH_DELAY)
+    )
+
+    # The fifth failure in a row opens the circuit
+    await coordinator.async_refresh()
+    assert ista_server.calls["download"] == 1 + CIRCUIT_FAILURE_THRESHOLD
+    assert coordinator.breaker.state is CircuitState.OPEN
+    assert coordinator.update_interval >= timedelta(
+        seconds=CIRCUIT_OPEN_DURATION - 1
+    )
+
+    # Nothing is sent to the portal while the circuit is open
+    calls = ista_server.calls.copy()
+    await coordinator.async_refresh()
+    assert ista_server.calls == calls
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["circuit_breaker"]["state"] == CircuitState.OPEN
+    assert diagnostics["circuit_breaker"]["retry_at"] is not None
+    assert diagnostics["failed_refreshes"] == 3
+
+    # The portal is back once the circuit lets a probe through
+    ista_server.failures.clear()
+    freezer.tick(timedelta(seconds=CIRCUIT_OPEN_DURATION))
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.breaker.state is CircuitState.CLOSED
+    assert coordinator.backoff.failures == 0
+
+
+async def test_outage_marks_entities_unavailable(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test entities go unavailable on a failed refresh by default."""
+    entry = await _setup_entry(hass)
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+
+    ista_server.failures["download"] = 100
+    await entry.runtime_data.coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == STATE_UNAVAILABLE
+
+
+async def test_stale_data_served_through_outage(
+    hass: HomeAssistant,
+    ista_server: FakeIstaServer,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test the last data is served with its age until the budget is spent."""
+    entry = await _setup_entry(
+        hass, **{CONF_SERVE_STALE: True, CONF_STALE_BUDGET_DAYS: 1}
+    )
+    coordinator = entry.runtime_data.coordinator
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    state = hass.states.get(entity_id)
+    assert "data_age" not in state.attributes
+    last_refresh = coordinator.last_successful_refresh
+
+    ista_server.failures["download"] = 100
+    freezer.tick(timedelta(hours=1))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    stale = hass.states.get(entity_id)
+    assert stale.state == state.state
+    assert stale.attributes["data_age"] == 3600
+    assert stale.attributes["last_successful_refresh"] == last_refresh.isoformat()
+
+    # Further failures keep the age current
+    freezer.tick(timedelta(hours=1))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).attributes["data_age"] == 7200
+
+    # Unavailable once the data is older than the budget
+    freezer.tick(timedelta(hours=22))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == STATE_UNAVAILABLE
+
+    # The portal is back
+    ista_server.failures.clear()
+    freezer.tick(timedelta(seconds=CIRCUIT_OPEN_DURATION))
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = hass.states.get(entity_id)
+    assert state.state != STATE_UNAVAILABLE
+    assert "data_age" not in state.attributes
@@ -0,0 +1,105 @@
+"""Test the ista VDM refresh scheduler."""
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ista_vdm.const import (
+    DOMAIN,
+    MAX_CONCURRENT_REFRESHES,
+    REFRESH_WINDOW,
+)
+from custom_components.ista_vdm.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.ista_vdm.scheduler import (
+    IstaVdmRefreshScheduler,
+    refresh_offset,
+)
+
+from .conftest import FakeIstaServer
+
+
+async def test_offsets_spread_over_window(hass: HomeAssistant) -> None:
+    """Test entries get stable offsets spread over the whole window."""
+    entry_ids = [f"entry_{i}" for i in range(48)]
+    offsets = [refresh_offset(entry_id).total_seconds() for entry_id in entry_ids]
+
+    assert offsets == [
+        refresh_offset(entry_id).total_seconds() for entry_id in entry_ids
+    ]
+    assert all(0 <= offset < REFRESH_WINDOW for offset in offsets)
+    # Without jitter all 48 would share a single 5 minute bucket
+    buckets = Counter(offset // 300 for offset in offsets)
+    assert max(buckets.values()) <= len(entry_ids) // 6
+
+
+async def test_next_interval_lands_on_entry_slot(hass: HomeAssistant) -> None:
+    """Test the interval is stretched to the entry's offset in the window."""
+    scheduler = IstaVdmRefreshScheduler()
+    interval = timedelta(hours=24)
+    offset = refresh_offset("entry").total_seconds()
+
+    for minute in (0, 17, 59):
+        now = datetime(2025, 12, 10, 8, minute, tzinfo=dt_util.UTC)
+        delay = scheduler.next_interval("entry", now, interval)
+
+        assert interval <= delay < interval + timedelta(seconds=REFRESH_WINDOW)
+        assert (now + delay).timestamp() % REFRESH_WINDOW == offset
+
+
+async def test_slot_caps_concurrency(hass: HomeAssistant) -> None:
+    """Test refreshes beyond the cap wait in the queue."""
+    scheduler = IstaVdmRefreshScheduler(max_concurrent=2)
+    running: list[int] = []
+
+    async def _refresh() -> None:
+        async with scheduler.async_slot():
+            running.append(scheduler.running)
+            await asyncio.sleep(0.01)
+
+    refreshes = [asyncio.ensure_future(_refresh()) for _ in range(10)]
+    await asyncio.sleep(0)
+    assert scheduler.running == 2
+    assert scheduler.queued == 8
+    await asyncio.gather(*refreshes)
+
+    assert max(running) == 2
+    assert scheduler.as_dict() == {"max_concurrent": 2, "running": 0, "queued": 0}
+
+
+async def test_setup_of_many_entries_is_capped(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test logins and refreshes of many entries do not all hit the portal."""
+    ista_server.delay = 0.05
+    entries = []
+    for i in range(6):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={"email": f"user{i}@example.com", "password": "password"},
+            unique_id=f"user{i}@example.com",
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    await asyncio.gather(
+        *(hass.config_entries.async_setup(entry.entry_id) for entry in entries)
+    )
+    await hass.async_block_till_done()
+
+    assert ista_server.calls["login"] == 6
+    assert ista_server.calls["download"] == 6
+    assert ista_server.max_in_flight <= MAX_CONCURRENT_REFRESHES
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entries[0])
+    assert diagnostics["scheduler"] == {
+        "refresh_offset": refresh_offset(entries[0].entry_id).total_seconds(),
+        "max_concurrent": MAX_CONCURRENT_REFRESHES,
+        "running": 0,
+        "queued": 0,
+    }
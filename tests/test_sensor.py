@@ -1,30 +1,53 @@
 """Test the ista VDM sensor platform."""
 
-from datetime import date
+import timeit
+import tracemalloc
+from collections import Counter
+from collections.abc import Mapping
+from datetime import date, timedelta
+from itertools import repeat
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy, UnitOfVolume
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    EVENT_STATE_CHANGED,
+    EVENT_STATE_REPORTED,
+    UnitOfEnergy,
+    UnitOfVolume,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceRegistry
-from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.helpers.json import json_bytes
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.ista_vdm.api import ConsumptionData
+from ista_vdm_api import ConsumptionData
+
 from custom_components.ista_vdm.const import DOMAIN
+from custom_components.ista_vdm.models import (
+    IstaVdmConsumptionSnapshot,
+    IstaVdmHistoryFormat,
+)
 from custom_components.ista_vdm.sensor import (
-    IstaVdmFlatCitySensor,
-    IstaVdmHeatingSensor,
-    IstaVdmHotWaterSensor,
+    CONSUMPTION_SENSORS,
+    FLAT_SENSORS,
+    IstaVdmFlatSensor,
+    IstaVdmSensor,
 )
 
+from .conftest import FakeIstaServer, mock_api_client
+
+HEATING, HOT_WATER = CONSUMPTION_SENSORS
+
 
 @pytest.fixture
 def mock_coordinator():
     """Create a mock coordinator."""
     coordinator = MagicMock()
-    coordinator.data = [
+    coordinator.serving_stale = False
+    coordinator.data = {"1": IstaVdmConsumptionSnapshot.from_records([
         ConsumptionData(
             period_start=date(2025, 12, 1),
             period_end=date(2025, 12, 31),
@@ -41,18 +64,48 @@ def mock_coordinator():
             hot_water_consumption=0.29,
             hot_water_cost=None,
         ),
-    ]
-    coordinator.flat_info = {
-        "city": "Vienna",
-        "street": "Test Street",
-        "housenumber": "123",
-        "door": "4",
-        "squaremeter": 56.9,
-        "postalcode": "1010",
+    ])}
+    return coordinator
+
+
+@pytest.fixture
+def mock_flat_coordinator():
+    """Create a mock flat info coordinator."""
+    coordinator = MagicMock()
+    coordinator.serving_stale = False
+    coordinator.data = {
+        "1": {
+            "city": "Vienna",
+            "street": "Test Street",
+            "housenumber": "123",
+            "door": "4",
+            "squaremeter": 56.9,
+            "postalcode": "1010",
+        }
     }
     return coordinator
 
 
+def _monthly_records(months: int) -> list[ConsumptionData]:
+    """Build one consumption record per month, oldest first."""
+    records = []
+    start = date(2006, 1, 1)
+    for _ in range(months):
+        next_start = (start + timedelta(days=32)).replace(day=1)
+        records.append(
+            ConsumptionData(
+                period_start=start,
+                period_end=next_start - timedelta(days=1),
+                heating_consumption=300.0,
+                heating_cost=None,
+                hot_water_consumption=0.3,
+                hot_water_cost=None,
+            )
+        )
+        start = next_start
+    return records
+
+
 @pytest.fixture
 def mock_entry():
     """Create a mock config entry."""
@@ -73,7 +126,9 @@ def mock_device_info():
 
 async def test_heating_sensor(hass: HomeAssistant, mock_coordinator, mock_entry, mock_device_info) -> None:
     """Test heating sensor."""
-    sensor = IstaVdmHeatingSensor(mock_coordinator, mock_entry, mock_device_info)
+    sensor = IstaVdmSensor(
+        mock_coordinator, HEATING, mock_entry, mock_device_info, "1"
+    )
     
     assert sensor.name == "Heating Consumption"
     assert sensor.device_class == "energy"
@@ -92,7 +147,9 @@ async def test_heating_sensor(hass: HomeAssistant, mock_coordinator, mock_entry,
 
 async def test_hot_water_sensor(hass: HomeAssistant, mock_coordinator, mock_entry, mock_device_info) -> None:
     """Test hot water sensor."""
-    sensor = IstaVdmHotWaterSensor(mock_coordinator, mock_entry, mock_device_info)
+    sensor = IstaVdmSensor(
+        mock_coordinator, HOT_WATER, mock_entry, mock_device_info, "1"
+    )
     
     assert sensor.name == "Hot Water Consumption"
     assert sensor.device_class == "water"
@@ -108,9 +165,11 @@ async def test_hot_water_sensor(hass: HomeAssistant, mock_coordinator, mock_entr
     assert len(attrs["history"]) == 2
 
 
-async def test_flat_city_sensor(hass: HomeAssistant, mock_coordinator, mock_entry, mock_device_info) -> None:
+async def test_flat_city_sensor(hass: HomeAssistant, mock_flat_coordinator, mock_entry, mock_device_info) -> None:
     """Test flat city sensor."""
-    sensor = IstaVdmFlatCitySensor(mock_coordinator, mock_entry, mock_device_info)
+    sensor = IstaVdmFlatSensor(
+        mock_flat_coordinator, FLAT_SENSORS[0], mock_entry, mock_device_info, "1"
+    )
     
     assert sensor.name == "City"
     assert sensor.native_value == "Vienna"
@@ -119,9 +178,10 @@ async def test_flat_city_sensor(hass: HomeAssistant, mock_coordinator, mock_entr
 async def test_sensor_no_data(hass: HomeAssistant, mock_entry, mock_device_info) -> None:
     """Test sensors handle no data gracefully."""
     coordinator = MagicMock()
+    coordinator.serving_stale = False
     coordinator.data = None
     
-    sensor = IstaVdmHeatingSensor(coordinator, mock_entry, mock_device_info)
+    sensor = IstaVdmSensor(coordinator, HEATING, mock_entry, mock_device_info, "1")
     assert sensor.native_value is None
 
 
@@ -137,10 +197,13 @@ async def test_async_setup_entry(hass: HomeAssistant) -> None:
     entry.add_to_hass(hass)
     
     with patch(
-        "custom_components.ista_vdm.sensor.IstaVdmAPI",
+        "ista_vdm_api.IstaVdmAPI",
         autospec=True,
-    ) as mock_api:
-        api_instance = AsyncMock()
+    ) as mock_api, patch(
+        "custom_components.ista_vdm.coordinator.async_get_flat_ids",
+        return_value=["1"],
+    ):
+        api_instance = mock_api_client()
         api_instance.authenticate = AsyncMock(return_value=True)
         api_instance.get_consumption_data = AsyncMock(return_value=[
             ConsumptionData(
@@ -162,11 +225,205 @@ async def test_async_setup_entry(hass: HomeAssistant) -> None:
         await hass.async_block_till_done()
         
         # Check sensors were created
-        entity_registry = EntityRegistry.async_get(hass)
+        entity_registry = er.async_get(hass)
         entities = [
             entity for entity in entity_registry.entities.values()
             if entity.config_entry_id == entry.entry_id
         ]
         
-        # Should have 9 entities (2 consumption + 6 flat info + 1 last updated)
-        assert len(entities) == 9
+        # 2 consumption + 6 flat info
+        assert len(entities) == len(CONSUMPTION_SENSORS) + len(FLAT_SENSORS) == 8
+
+
+async def test_native_value_cost_independent_of_history(
+    hass: HomeAssistant, mock_entry, mock_device_info
+) -> None:
+    """Benchmark native_value reads for 12 and 240 months of history."""
+    timings = {}
+    for months in (12, 240):
+        coordinator = MagicMock()
+        coordinator.serving_stale = False
+        coordinator.data = {
+            "1": IstaVdmConsumptionSnapshot.from_records(_monthly_records(months))
+        }
+        sensor = IstaVdmSensor(coordinator, HEATING, mock_entry, mock_device_info, "1")
+        timings[months] = min(
+            timeit.repeat(lambda: sensor.native_value, number=2000, repeat=5)
+        )
+
+    # A max() scan over 240 records is ~20x slower than over 12; a cached
+    # latest record keeps both reads within noise of each other.
+    assert timings[240] < timings[12] * 3
+
+
+async def test_history_attributes_shared_and_allocation_free(
+    hass: HomeAssistant, mock_entry, mock_device_info
+) -> None:
+    """Test repeated attribute reads reuse the payload rendered per refresh."""
+    coordinator = MagicMock()
+    coordinator.serving_stale = False
+    coordinator.data = {
+        "1": IstaVdmConsumptionSnapshot.from_records(_monthly_records(240))
+    }
+    heating = IstaVdmSensor(coordinator, HEATING, mock_entry, mock_device_info, "1")
+    hot_water = IstaVdmSensor(coordinator, HOT_WATER, mock_entry, mock_device_info, "1")
+
+    heating_attrs = heating.extra_state_attributes
+    hot_water_attrs = hot_water.extra_state_attributes
+    assert heating.extra_state_attributes is heating_attrs
+    # Both sensors share the formatted period strings
+    assert (
+        heating_attrs["history"][0]["period_start"]
+        is hot_water_attrs["history"][0]["period_start"]
+    )
+    with pytest.raises(RuntimeError):
+        heating_attrs["history"][0]["consumption_kwh"] = 0
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        # The loop counter itself must not hold a freshly allocated int
+        for _ in repeat(None, 1000):
+            heating.extra_state_attributes
+            hot_water.extra_state_attributes
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert after - before == 0
+    # Rebuilding 240 history rows would allocate tens of kilobytes per read
+    assert peak - before < 1024
+
+
+async def test_state_writes_over_30_days(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Count consumption sensor state writes over 30 daily refreshes."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": "test@example.com", "password": "password"},
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    entity_ids = {
+        entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{entry.entry_id}_{key}"
+        )
+        for key in ("heating_consumption", "hot_water_consumption")
+    }
+    writes: Counter[str] = Counter()
+
+    @callback
+    def _is_consumption_sensor(event_data: Mapping[str, Any]) -> bool:
+        return event_data["entity_id"] in entity_ids
+
+    @callback
+    def _count(event: Event) -> None:
+        writes[event.data["entity_id"]] += 1
+
+    # Unchanged states are reported instead of changed, count both
+    for event_type in (EVENT_STATE_CHANGED, EVENT_STATE_REPORTED):
+        hass.bus.async_listen(
+            event_type, _count, event_filter=_is_consumption_sensor
+        )
+
+    coordinator = entry.runtime_data.coordinator
+    for day in range(30):
+        if day == 15:
+            # A correction of the latest heating value is published
+            ista_server.csv = ista_server.csv.replace("392,1", "400,0")
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    assert ista_server.calls["download"] == 31
+    # Without change detection every refresh wrote both sensors (60 writes)
+    assert sum(writes.values()) == 1
+    heating = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    assert writes[heating] == 1
+    assert hass.states.get(heating).state == "400.0"
+
+
+async def test_serialized_history_attribute_bytes(
+    hass: HomeAssistant, mock_entry, mock_device_info
+) -> None:
+    """Measure the serialized attribute bytes of 240 months of history."""
+    records = _monthly_records(240)
+    sizes = {}
+    for name, history_format in (
+        ("list", IstaVdmHistoryFormat()),
+        ("compact", IstaVdmHistoryFormat(compact=True)),
+        ("compact_24", IstaVdmHistoryFormat(months=24, compact=True)),
+    ):
+        coordinator = MagicMock()
+        coordinator.serving_stale = False
+        coordinator.data = {
+            "1": IstaVdmConsumptionSnapshot.from_records(records, history_format)
+        }
+        sensor = IstaVdmSensor(coordinator, HEATING, mock_entry, mock_device_info, "1")
+        attributes = sensor.extra_state_attributes
+        sizes[name] = len(json_bytes(attributes))
+        recorded = {
+            key: value
+            for key, value in attributes.items()
+            if key not in sensor._unrecorded_attributes
+        }
+        sizes[f"{name}_recorded"] = len(json_bytes(recorded))
+
+    # Parallel arrays drop the repeated keys of every month
+    assert sizes["compact"] < sizes["list"] * 0.6
+    assert sizes["compact_24"] < sizes["list"] * 0.1
+    # The recorder only keeps the latest period and the month count
+    assert sizes["list_recorded"] < 100
+    assert sizes["list_recorded"] < sizes["list"] * 0.01
+
+
+async def test_entity_memory_500_entries(hass: HomeAssistant) -> None:
+    """Measure the memory of the entities of 500 config entries."""
+    coordinator = MagicMock()
+    coordinator.serving_stale = False
+    flat_coordinator = MagicMock()
+    flat_coordinator.serving_stale = False
+    entries = []
+    for index in range(500):
+        entry = MagicMock(spec=ConfigEntry)
+        entry.entry_id = f"entry_{index}"
+        entries.append(entry)
+    device_info = {"identifiers": {(DOMAIN, "1")}}
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        sensors = [
+            sensor
+            for entry in entries
+            for sensor in (
+                *(
+                    IstaVdmSensor(coordinator, description, entry, device_info, "1")
+                    for description in CONSUMPTION_SENSORS
+                ),
+                *(
+                    IstaVdmFlatSensor(
+                        flat_coordinator, description, entry, device_info, "1"
+                    )
+                    for description in FLAT_SENSORS
+                ),
+            )
+        ]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(sensors) == 500 * 8
+    # Descriptions are shared, the instances only hold their own state
+    assert all(
+        sensor.entity_description in (*CONSUMPTION_SENSORS, *FLAT_SENSORS)
+        for sensor in sensors
+    )
+    assert (after - before) / len(sensors) < 2048
@@ -0,0 +1,108 @@
+"""Test the coalescing of concurrent ista VDM requests."""
+
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ista_vdm.const import DOMAIN
+from custom_components.ista_vdm.singleflight import IstaVdmSingleFlight
+
+from .conftest import FakeIstaServer
+
+
+async def test_single_flight_shares_result(hass: HomeAssistant) -> None:
+    """Test concurrent callers share one call, its result and its error."""
+    single_flight = IstaVdmSingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def _call() -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        if calls == 2:
+            raise ValueError("boom")
+        return calls
+
+    callers = [
+        asyncio.ensure_future(single_flight.async_do("key", _call)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    # A cancelled caller does not cancel the call for the others
+    callers.pop().cancel()
+    release.set()
+
+    assert await asyncio.gather(*callers) == [1, 1, 1, 1]
+    assert single_flight.as_dict() == {"in_flight": 0, "coalesced": 4}
+
+    # Calls after the flight landed start a new one
+    results = await asyncio.gather(
+        single_flight.async_do("key", _call),
+        single_flight.async_do("key", _call),
+        return_exceptions=True,
+    )
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert calls == 2
+
+
+async def test_concurrent_triggers_fetch_once(
+    hass: HomeAssistant, ista_server: FakeIstaServer
+) -> None:
+    """Test 20 overlapping refresh triggers send a single request."""
+    assert await async_setup_component(hass, "homeassistant", {})
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": "test@example.com", "password": "password"},
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = entry.runtime_data.coordinator
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{entry.entry_id}_heating_consumption"
+    )
+    calls = ista_server.calls.copy()
+    ista_server.delay = 0.05
+
+    await asyncio.gather(
+        # Scheduled polls
+        *(coordinator.async_refresh() for _ in range(10)),
+        # Manual entity updates
+        *(
+            hass.services.async_call(
+                "homeassistant",
+                "update_entity",
+                {"entity_id": entity_id},
+                blocking=True,
+            )
+            for _ in range(5)
+        ),
+        # The refresh action
+        *(
+            hass.services.async_call(
+                DOMAIN, "refresh", {"config_entry_id": entry.entry_id}, blocking=True
+            )
+            for _ in range(5)
+        ),
+    )
+
+    assert ista_server.calls["flats"] == calls["flats"] + 1
+    assert ista_server.calls["download"] == calls["download"] + 1
+    assert ista_server.calls["login"] == calls["login"]
+    assert coordinator.single_flight.coalesced >= 9
+
+
+async def test_refresh_unknown_entry(hass: HomeAssistant) -> None:
+    """Test the refresh action rejects entries of other integrations."""
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, "refresh", {"config_entry_id": "unknown"}, blocking=True
+        )
@@ -0,0 +1,199 @@
+"""Test the ista VDM long-term statistics import."""
+
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.components.recorder.models import (
+    StatisticMeanType,
+    StatisticMetaData,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from ista_vdm_api import ConsumptionData
+
+from custom_components.ista_vdm.const import DOMAIN
+from custom_components.ista_vdm.models import IstaVdmConsumptionSnapshot
+from custom_components.ista_vdm.statistics import (
+    IstaVdmStatisticsImporter,
+    statistic_id,
+)
+
+# Imported by the importer when it runs, so patched at the source
+RECORDER = "homeassistant.components.recorder"
+
+
+def _record(month: int, heating: float, hot_water: float) -> ConsumptionData:
+    """Build a record for a month in 2025."""
+    return ConsumptionData(
+        period_start=date(2025, month, 1),
+        period_end=date(2025, month, 28),
+        heating_consumption=heating,
+        heating_cost=None,
+        hot_water_consumption=hot_water,
+        hot_water_cost=None,
+    )
+
+
+async def test_import_only_new_periods(hass: HomeAssistant) -> None:
+    """Test every refresh imports only the periods after the last import."""
+    hass.config.components.add("recorder")
+    entry = MockConfigEntry(domain=DOMAIN, title="Ista VDM")
+    importer = IstaVdmStatisticsImporter(hass, entry)
+    recorder = MagicMock()
+    recorder.async_add_executor_job = AsyncMock(return_value={})
+
+    with (
+        patch(
+            f"{RECORDER}.get_instance",
+            return_value=recorder,
+        ),
+        patch(
+            f"{RECORDER}.statistics.async_add_external_statistics"
+        ) as mock_add,
+    ):
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records(
+                [_record(10, 100.0, 0.1), _record(11, 200.0, 0.2)]
+            )
+        )
+        heating_id = statistic_id(entry, "heating_consumption")
+        metadata, statistics = mock_add.call_args_list[0].args[1:]
+        assert metadata["statistic_id"] == heating_id
+        assert [s["sum"] for s in statistics] == [100.0, 300.0]
+        assert statistics[0]["start"] == dt_util.start_of_local_day(date(2025, 10, 1))
+        assert mock_add.call_count == 2
+
+        # Unchanged data imports nothing and does not query the recorder again
+        mock_add.reset_mock()
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records(
+                [_record(10, 100.0, 0.1), _record(11, 200.0, 0.2)]
+            )
+        )
+        mock_add.assert_not_called()
+        assert recorder.async_add_executor_job.call_count == 2
+
+        # A new month is appended on top of the running sum
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records(
+                [_record(10, 100.0, 0.1), _record(11, 200.0, 0.2), _record(12, 50.0, 0.3)]
+            )
+        )
+        _, statistics = mock_add.call_args_list[0].args[1:]
+        assert [(s["state"], s["sum"]) for s in statistics] == [(50.0, 350.0)]
+
+
+async def test_import_resumes_from_recorder(hass: HomeAssistant) -> None:
+    """Test the running sum continues from the last recorded statistic."""
+    hass.config.components.add("recorder")
+    entry = MockConfigEntry(domain=DOMAIN, title="Ista VDM")
+    importer = IstaVdmStatisticsImporter(hass, entry)
+    last_start = dt_util.start_of_local_day(date(2025, 11, 1))
+
+    async def _last_statistics(func, hass, count, stat_id, convert, types):
+        return {stat_id: [{"start": last_start.timestamp(), "sum": 1000.0}]}
+
+    recorder = MagicMock()
+    recorder.async_add_executor_job = AsyncMock(side_effect=_last_statistics)
+
+    with (
+        patch(
+            f"{RECORDER}.get_instance",
+            return_value=recorder,
+        ),
+        patch(
+            f"{RECORDER}.statistics.async_add_external_statistics"
+        ) as mock_add,
+    ):
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records(
+                [_record(10, 100.0, 0.1), _record(11, 200.0, 0.2), _record(12, 50.0, 0.3)]
+            )
+        )
+
+    _, statistics = mock_add.call_args_list[0].args[1:]
+    assert [(s["state"], s["sum"]) for s in statistics] == [(50.0, 1050.0)]
+
+
+async def test_import_corrected_periods(hass: HomeAssistant) -> None:
+    """Test corrected recent periods are imported again with their sums."""
+    hass.config.components.add("recorder")
+    entry = MockConfigEntry(domain=DOMAIN, title="Ista VDM")
+    importer = IstaVdmStatisticsImporter(hass, entry)
+
+    async def _last_statistics(func, hass, count, stat_id, convert, types):
+        # The two periods of the overlap window, newest first
+        return {
+            stat_id: [
+                {
+                    "start": dt_util.start_of_local_day(date(2025, 11, 1)).timestamp(),
+                    "state": 200.0,
+                    "sum": 1000.0,
+                },
+                {
+                    "start": dt_util.start_of_local_day(date(2025, 10, 1)).timestamp(),
+                    "state": 100.0,
+                    "sum": 800.0,
+                },
+            ]
+        }
+
+    recorder = MagicMock()
+    recorder.async_add_executor_job = AsyncMock(side_effect=_last_statistics)
+
+    with (
+        patch(
+            f"{RECORDER}.get_instance",
+            return_value=recorder,
+        ),
+        patch(
+            f"{RECORDER}.statistics.async_add_external_statistics"
+        ) as mock_add,
+    ):
+        # October was corrected by the portal, September is out of the window
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records(
+                [
+                    _record(9, 999.0, 0.9),
+                    _record(10, 110.0, 0.1),
+                    _record(11, 200.0, 0.2),
+                    _record(12, 50.0, 0.3),
+                ]
+            )
+        )
+        metadata, statistics = mock_add.call_args_list[0].args[1:]
+        assert [(s["state"], s["sum"]) for s in statistics] == [
+            (110.0, 810.0),
+            (200.0, 1010.0),
+            (50.0, 1060.0),
+        ]
+        assert metadata["mean_type"] is StatisticMeanType.NONE
+        assert "has_mean" not in metadata
+        if "unit_class" in StatisticMetaData.__annotations__:
+            assert metadata["unit_class"] == "energy"
+
+        # A correction of the newest period only touches that period
+        mock_add.reset_mock()
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records(
+                [_record(10, 110.0, 0.1), _record(11, 200.0, 0.2), _record(12, 60.0, 0.3)]
+            )
+        )
+        _, statistics = mock_add.call_args_list[0].args[1:]
+        assert [(s["state"], s["sum"]) for s in statistics] == [(60.0, 1070.0)]
+
+
+async def test_import_skipped_without_recorder(hass: HomeAssistant) -> None:
+    """Test nothing is imported when the recorder is not loaded."""
+    importer = IstaVdmStatisticsImporter(hass, MockConfigEntry(domain=DOMAIN))
+
+    with patch(
+        f"{RECORDER}.statistics.async_add_external_statistics"
+    ) as mock_add:
+        await importer.async_import(
+            IstaVdmConsumptionSnapshot.from_records([_record(10, 100.0, 0.1)])
+        )
+
+    mock_add.assert_not_called()
@@ -0,0 +1,113 @@
+"""Test the ista VDM websocket API."""
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import WebSocketGenerator
+
+from custom_components.ista_vdm.const import DOMAIN
+
+from .conftest import FakeIstaServer
+
+
+async def _setup_entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Set up an entry for the fake portal account."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"email": "test@example.com", "password": "password"},
+        unique_id="test@example.com",
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_history_pages(
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+    ista_server: FakeIstaServer,
+) -> None:
+    """Test the history is served page by page, newest first."""
+    entry = await _setup_entry(hass)
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "ista_vdm/history", "entry_id": entry.entry_id, "page_size": 1}
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"] == {
+        "history": [
+            {
+                "period_start": "2025-12-01",
+                "period_end": "2025-12-31",
+                "consumption_kwh": 392.1,
+            }
+        ],
+        "total": 2,
+        "next_offset": 1,
+    }
+
+    await client.send_json_auto_id(
+        {
+            "type": "ista_vdm/history",
+            "entry_id": entry.entry_id,
+            "metric": "hot_water_consumption",
+            "offset": 1,
+            "page_size": 1,
+        }
+    )
+    response = await client.receive_json()
+    assert response["result"]["history"] == [
+        {
+            "period_start": "2025-11-01",
+            "period_end": "2025-11-30",
+            "consumption_m3": 0.29,
+        }
+    ]
+    assert response["result"]["next_offset"] is None
+
+    # The portal is not asked again for any page
+    assert ista_server.calls["download"] == 1
+
+
+async def test_history_period_range(
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+    ista_server: FakeIstaServer,
+) -> None:
+    """Test the history can be limited to a range of periods."""
+    entry = await _setup_entry(hass)
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {
+            "type": "ista_vdm/history",
+            "entry_id": entry.entry_id,
+            "start": "2025-11-01",
+            "end": "2025-11-30",
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    assert [row["period_start"] for row in response["result"]["history"]] == [
+        "2025-11-01"
+    ]
+    assert response["result"]["total"] == 1
+
+
+async def test_history_unknown_entry(
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+    ista_server: FakeIstaServer,
+) -> None:
+    """Test requesting the history of an unknown entry fails."""
+    await _setup_entry(hass)
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "ista_vdm/history", "entry_id": "unknown"}
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "not_found"